@@ -0,0 +1,222 @@
+import logging
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.core.files.base import ContentFile
+from django.http import StreamingHttpResponse
+
+from .images import (
+    MAX_PHOTO_SIZE, UPLOAD_THREADS, bulk_create_photos, in_thread, save_photo_content
+)
+from .models import Student, StudentPhoto
+
+
+# 每批处理的压缩包成员数，每批结束后用一次 bulk_create 写入记录
+ARCHIVE_BATCH_SIZE = 200
+
+# 压缩包中可导入的相片扩展名
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+
+# ZIP 通用标志位第 11 位：文件名使用 UTF-8 编码
+ZIP_UTF8_FLAG = 0x800
+
+# 打包下载时每批从数据库读取的相片记录数
+EXPORT_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def member_filename(info):
+    """压缩包成员的文件名；未标记 UTF-8 时按 GBK 解码（Windows 压缩工具的默认编码）"""
+    name = info.filename
+    if not info.flag_bits & ZIP_UTF8_FLAG:
+        try:
+            name = name.encode('cp437').decode('gbk')
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            pass
+    return name
+
+
+def archive_members(archive):
+    """
+    返回压缩包中的相片成员 [(成员信息, 文件名, 学号)]
+
+    文件名（不含扩展名）即学号，允许放在子目录中；跳过目录、隐藏文件和 macOS 附加文件。
+    """
+    members = []
+    for info in archive.infolist():
+        name = member_filename(info)
+        basename = os.path.basename(name)
+        if info.is_dir() or name.startswith('__MACOSX/') or basename.startswith('.'):
+            continue
+        student_id, _ = os.path.splitext(basename)
+        members.append((info, name, student_id.strip()))
+    return members
+
+
+def store_archive_member(archive, info, name, student):
+    """解压单个成员并写入存储，返回相片的文件字段值；内存中只保留这一张相片"""
+    if not name.lower().endswith(PHOTO_EXTENSIONS):
+        raise ValueError('文件类型必须是图片')
+    if info.file_size > MAX_PHOTO_SIZE:
+        raise ValueError('文件大小不能超过5MB')
+
+    with archive.open(info) as member:
+        # 不信任压缩包头部记录的大小，最多读取上限加一个字节
+        data = member.read(MAX_PHOTO_SIZE + 1)
+    if len(data) > MAX_PHOTO_SIZE:
+        raise ValueError('文件大小不能超过5MB')
+
+    return save_photo_content(student, ContentFile(data, name=os.path.basename(name)))
+
+
+def import_photo_archive(file, primary=False, batch_size=ARCHIVE_BATCH_SIZE, threads=UPLOAD_THREADS):
+    """
+    从 ZIP 压缩包批量导入学员相片，文件名为学号
+
+    所有学号通过一次 in_bulk 查询解析为学员；成员在线程池中逐个解压、校验并写入存储，
+    每批用一次 bulk_create 插入记录。同时解压的相片数不超过线程数，内存占用与压缩包大小无关。
+    primary=True 时把导入的相片设为主相片。压缩包无效时抛出 ValueError。
+    """
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise ValueError('无效的ZIP文件')
+
+    results = {
+        'total': 0,
+        'success': 0,
+        'failed': 0,
+        'errors': []
+    }
+
+    def fail(name, error):
+        results['failed'] += 1
+        results['errors'].append({'filename': name, 'error': str(error)})
+
+    with archive, ThreadPoolExecutor(max_workers=threads) as pool:
+        members = archive_members(archive)
+        results['total'] = len(members)
+
+        students = Student.objects.only('pk', 'student_id').in_bulk(
+            {student_id for _, _, student_id in members},
+            field_name='student_id'
+        )
+
+        pending = []
+        for info, name, student_id in members:
+            student = students.get(student_id)
+            if student is None:
+                fail(name, f'学号 {student_id} 不存在')
+            else:
+                pending.append((info, name, student))
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            futures = [
+                pool.submit(in_thread, store_archive_member, archive, info, name, student)
+                for info, name, student in batch
+            ]
+
+            photos = []
+            for (info, name, student), future in zip(batch, futures):
+                error = future.exception()
+                if error is not None:
+                    fail(name, error)
+                    continue
+                photos.append(StudentPhoto(
+                    student=student,
+                    description=os.path.basename(name)[:200],
+                    **future.result()
+                ))
+
+            if photos:
+                bulk_create_photos(photos, primary=primary)
+                results['success'] += len(photos)
+
+    return results
+
+
+def iter_photo_values(photos, batch_size=EXPORT_BATCH_SIZE):
+    """按 pk 分批读取 (相片ID, 学号, 存储路径)，不一次性取回全部记录"""
+    photos = photos.order_by('pk').values_list('pk', 'student__student_id', 'photo')
+    last_pk = 0
+    while True:
+        rows = list(photos.filter(pk__gt=last_pk)[:batch_size])
+        if not rows:
+            return
+        yield from rows
+        last_pk = rows[-1][0]
+
+
+def archive_entry_name(student_id, photo_id, name):
+    """压缩包中的文件名，如 2024001/15.jpg；扩展名沿用相片文件的实际格式"""
+    extension = os.path.splitext(name)[1].lower() or '.jpg'
+    if extension == '.jpeg':
+        extension = '.jpg'
+    return f'{student_id}/{photo_id}{extension}'
+
+
+class ZipStreamBuffer:
+    """
+    只实现 write 的伪文件对象
+
+    zipfile 写入的数据暂存在这里，由生成器随即取走，不可 seek 时 zipfile 会改用数据描述符记录大小。
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_photo_archive(photos):
+    """
+    边读取相片文件边生成 ZIP 数据
+
+    相片本身已压缩，使用 ZIP_STORED 存储；内存中只保留当前读取的一个文件块，
+    存储中缺失的文件跳过并记录日志。
+    """
+    storage = StudentPhoto._meta.get_field('photo').storage
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for photo_id, student_id, name in iter_photo_values(photos):
+            try:
+                source = storage.open(name, 'rb')
+            except OSError:
+                logger.warning('打包下载时相片文件不存在: %s', name)
+                continue
+            info = zipfile.ZipInfo(
+                archive_entry_name(student_id, photo_id, name),
+                date_time=time.localtime()[:6]
+            )
+            with source, archive.open(info, 'w') as entry:
+                for chunk in source.chunks():
+                    entry.write(chunk)
+                    yield buffer.take()
+            yield buffer.take()
+    # 关闭压缩包时写入中央目录
+    yield buffer.take()
+
+
+def photo_archive_response(photos):
+    """以流式响应返回相片压缩包，不在内存或磁盘中缓存整个压缩包"""
+    response = StreamingHttpResponse(
+        (data for data in iter_photo_archive(photos) if data),
+        content_type='application/zip'
+    )
+    filename = f'student_photos_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,168 @@
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from PIL import Image
+
+from pxweb.response_cache import get_cache, tag_versions
+from .models import StudentPhoto
+
+
+# dHash 的边长，8 得到 64 位哈希
+HASH_SIZE = 8
+# 汉明距离不超过该值即视为近似重复（64 位哈希）
+DEFAULT_THRESHOLD = 10
+
+# 相片新增、删除或补算哈希后失效的缓存标签，查重结果按它的版本号缓存
+PHOTO_HASHES_TAG = 'student-photo-hashes'
+# 查重结果的缓存时间（秒），标签失效之外的兜底
+PHOTO_CLUSTERS_CACHE_TIMEOUT = getattr(settings, 'STUDENT_PHOTO_CLUSTERS_CACHE_TIMEOUT', 24 * 3600)
+
+# 数据库中以有符号 BIGINT 保存 64 位哈希
+SIGN_BIT = 1 << 63
+HASH_RANGE = 1 << 64
+
+
+def dhash(image, hash_size=HASH_SIZE):
+    """
+    计算图片的差值哈希（dHash）
+
+    缩小为 (hash_size+1) x hash_size 的灰度图，比较每行相邻像素的亮度，
+    结果对缩放、重新压缩和轻微裁剪不敏感。返回无符号整数。
+    """
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = np.packbits(pixels[:, 1:] > pixels[:, :-1])
+    return int.from_bytes(bits.tobytes(), 'big')
+
+
+def to_db(value):
+    """无符号 64 位哈希转为有符号整数，便于存入 BIGINT 列"""
+    return value - HASH_RANGE if value >= SIGN_BIT else value
+
+
+def from_db(value):
+    return value + HASH_RANGE if value < 0 else value
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """
+    按汉明距离组织的 BK 树
+
+    查询半径为 r 时，利用三角不等式只访问与当前节点距离在 [d-r, d+r] 内的子树，
+    不需要两两比较。哈希相同的相片合并到同一节点。
+    """
+
+    def __init__(self):
+        self.root = None
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = (value, [item], {})
+            return
+        node = self.root
+        while True:
+            node_value, items, children = node
+            distance = hamming(value, node_value)
+            if distance == 0:
+                items.append(item)
+                return
+            child = children.get(distance)
+            if child is None:
+                children[distance] = (value, [item], {})
+                return
+            node = child
+
+    def search(self, value, radius):
+        """返回 [(距离, 节点内的相片列表)]"""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node_value, items, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= radius:
+                found.append((distance, items))
+            for child_distance, child in children.items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+def find_clusters(entries, threshold=DEFAULT_THRESHOLD):
+    """
+    把 [(哈希, 相片ID)] 按近似程度分组
+
+    每张相片在 BK 树中查询半径 threshold 内的邻居，再用并查集合并成簇；
+    返回至少包含两张相片的簇列表，每个簇为相片ID列表。
+    """
+    tree = BKTree()
+    for value, photo_id in entries:
+        tree.add(value, photo_id)
+
+    parent = {}
+
+    def find(item):
+        parent.setdefault(item, item)
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for value, photo_id in entries:
+        for _, items in tree.search(value, threshold):
+            for other in items:
+                if other != photo_id:
+                    parent[find(other)] = find(photo_id)
+
+    clusters = defaultdict(list)
+    for photo_id in parent:
+        clusters[find(photo_id)].append(photo_id)
+    return [sorted(ids) for ids in clusters.values() if len(ids) > 1]
+
+
+def duplicate_photo_clusters(photos, threshold=DEFAULT_THRESHOLD, per_student=False):
+    """
+    查找近似重复的相片簇
+
+    per_student=True 时只在同一学员的相片中查找，否则在整个查询集中查找。
+    返回相片ID列表组成的簇，按簇中最小ID排序。
+    """
+    rows = photos.filter(phash__isnull=False).values_list('pk', 'student_id', 'phash')
+    if per_student:
+        groups = defaultdict(list)
+        for pk, student_id, value in rows.iterator():
+            groups[student_id].append((from_db(value), pk))
+        clusters = []
+        for entries in groups.values():
+            if len(entries) > 1:
+                clusters.extend(find_clusters(entries, threshold))
+    else:
+        entries = [(from_db(value), pk) for pk, _, value in rows.iterator()]
+        clusters = find_clusters(entries, threshold)
+    return sorted(clusters)
+
+
+def cached_photo_clusters(threshold=DEFAULT_THRESHOLD, per_student=False, student_id=None):
+    """
+    带缓存的 duplicate_photo_clusters，student_id 限定为某个学员的相片
+
+    半径较大时 BK 树查询几乎要访问全部节点，全库查重接近线性扫描，因此结果缓存在共享的
+    响应缓存中，缓存键包含 PHOTO_HASHES_TAG 的版本号，相片哈希变化后自动失效。
+    """
+    cache = get_cache()
+    version, = tag_versions(cache, [PHOTO_HASHES_TAG])
+    key = f'photo-clusters:{version}:{threshold}:{int(per_student)}:{student_id or ""}'
+    clusters = cache.get(key)
+    if clusters is None:
+        photos = StudentPhoto.objects.all()
+        if student_id:
+            photos = photos.filter(student_id=student_id)
+        clusters = duplicate_photo_clusters(photos, threshold, per_student)
+        cache.set(key, clusters, PHOTO_CLUSTERS_CACHE_TIMEOUT)
+    return clusters
@@ -0,0 +1,254 @@
+import csv
+import json
+import tempfile
+from datetime import datetime
+
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from rest_framework.negotiation import DefaultContentNegotiation
+
+from .models import Student
+
+
+# 每批从数据库读取的行数
+EXPORT_CHUNK_SIZE = 2000
+
+# 导出列：(表头, values_list 字段)
+EXPORT_COLUMNS = [
+    ('学号', 'student_id'),
+    ('姓名', 'user__first_name'),
+    ('姓氏', 'user__last_name'),
+    ('用户名', 'user__username'),
+    ('邮箱', 'user__email'),
+    ('电话', 'user__phone'),
+    ('院系', 'department'),
+    ('年级', 'grade'),
+    ('入学日期', 'enrollment_date'),
+    ('毕业日期', 'graduation_date'),
+    ('状态', 'status'),
+    ('创建时间', 'created_at'),
+]
+
+STATUS_DISPLAY = dict(Student.STATUS_CHOICES)
+
+# 支持的导出格式
+EXPORT_FORMATS = ('xlsx', 'csv', 'ndjson', 'parquet')
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """
+    导出接口的内容协商
+
+    format 查询参数用于选择导出文件格式，不参与 DRF 的渲染器选择。
+    """
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderer = renderers[0]
+        return renderer, renderer.media_type
+
+
+def iter_student_values(queryset, chunk_size=EXPORT_CHUNK_SIZE, progress=None):
+    """
+    按主键分批读取学员导出字段，每批只在内存中保留 chunk_size 行
+
+    MySQL 驱动不支持服务端游标，QuerySet.iterator() 仍会一次性取回全部结果，
+    因此这里按 pk 做 keyset 分批查询。progress 为可选回调，每批读取后以本批行数调用。
+    """
+    fields = [field for _, field in EXPORT_COLUMNS]
+    queryset = queryset.order_by('pk').values_list('pk', *fields)
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not rows:
+            return
+        for row in rows:
+            yield row[1:]
+        last_pk = rows[-1][0]
+        if progress:
+            progress(len(rows))
+
+
+def format_export_row(row):
+    """将一行原始字段值格式化为导出文本"""
+    (student_id, first_name, last_name, username, email, phone,
+     department, grade, enrollment_date, graduation_date,
+     status, created_at) = row
+    return [
+        student_id,
+        first_name,
+        last_name,
+        username,
+        email,
+        phone,
+        department,
+        grade,
+        enrollment_date.strftime('%Y-%m-%d') if enrollment_date else '',
+        graduation_date.strftime('%Y-%m-%d') if graduation_date else '',
+        STATUS_DISPLAY.get(status, status),
+        created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else '',
+    ]
+
+
+def record_key(field):
+    """机器可读格式（NDJSON/Parquet）使用的字段名"""
+    return field.replace('user__', '')
+
+
+def format_export_record(row):
+    """将一行原始字段值转换为 JSON 可序列化的字典"""
+    record = {}
+    for (_, field), value in zip(EXPORT_COLUMNS, row):
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        record[record_key(field)] = value
+    return record
+
+
+def export_filename(extension):
+    return f'students_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+
+
+def write_xlsx(queryset, output, progress=None):
+    """
+    以 write-only 模式写出 Excel 文件
+
+    write-only 工作表把行数据直接写入磁盘临时文件，内存占用与行数无关。
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('学员数据')
+    worksheet.append([header for header, _ in EXPORT_COLUMNS])
+    for row in iter_student_values(queryset, progress=progress):
+        worksheet.append(format_export_row(row))
+    workbook.save(output)
+
+
+def xlsx_response(queryset):
+    """生成 Excel 并以流式响应分块返回"""
+    output = tempfile.TemporaryFile()
+    write_xlsx(queryset, output)
+    output.seek(0)
+    # FileResponse 按块读取临时文件，响应结束后自动关闭并删除
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=export_filename('xlsx'),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+
+class Echo:
+    """只实现 write 的伪文件对象，供 csv.writer 逐行生成文本"""
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, progress=None):
+    writer = csv.writer(Echo())
+    # 带 BOM，Excel 打开时可正确识别 UTF-8 中文
+    yield '\ufeff' + writer.writerow([header for header, _ in EXPORT_COLUMNS])
+    for row in iter_student_values(queryset, progress=progress):
+        yield writer.writerow(format_export_row(row))
+
+
+def iter_ndjson(queryset, progress=None):
+    for row in iter_student_values(queryset, progress=progress):
+        yield json.dumps(format_export_record(row), ensure_ascii=False) + '\n'
+
+
+def write_csv(queryset, output, progress=None):
+    for line in iter_csv(queryset, progress):
+        output.write(line.encode('utf-8'))
+
+
+def write_ndjson(queryset, output, progress=None):
+    for line in iter_ndjson(queryset, progress):
+        output.write(line.encode('utf-8'))
+
+
+def csv_response(queryset):
+    response = StreamingHttpResponse(
+        iter_csv(queryset),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename("csv")}"'
+    return response
+
+
+def ndjson_response(queryset):
+    response = StreamingHttpResponse(
+        iter_ndjson(queryset),
+        content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename("ndjson")}"'
+    return response
+
+
+def write_parquet(queryset, output, progress=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """按列批次写出 Parquet 文件，每个批次对应一个 row group"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('student_id', pa.string()),
+        ('first_name', pa.string()),
+        ('last_name', pa.string()),
+        ('username', pa.string()),
+        ('email', pa.string()),
+        ('phone', pa.string()),
+        ('department', pa.string()),
+        ('grade', pa.string()),
+        ('enrollment_date', pa.date32()),
+        ('graduation_date', pa.date32()),
+        ('status', pa.string()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+    ])
+
+    def write_batch(writer, columns):
+        writer.write_batch(pa.record_batch(columns, schema=schema))
+
+    with pq.ParquetWriter(output, schema) as writer:
+        columns = [[] for _ in schema]
+        for row in iter_student_values(queryset, chunk_size, progress):
+            for column, value in zip(columns, row):
+                column.append(value)
+            if len(columns[0]) >= chunk_size:
+                write_batch(writer, columns)
+                columns = [[] for _ in schema]
+        if columns[0]:
+            write_batch(writer, columns)
+
+
+def parquet_response(queryset):
+    output = tempfile.TemporaryFile()
+    write_parquet(queryset, output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=export_filename('parquet'),
+        content_type='application/vnd.apache.parquet'
+    )
+
+
+EXPORT_RESPONSES = {
+    'xlsx': xlsx_response,
+    'csv': csv_response,
+    'ndjson': ndjson_response,
+    'parquet': parquet_response,
+}
+
+
+def export_response(queryset, export_format):
+    return EXPORT_RESPONSES[export_format](queryset)
+
+
+EXPORT_WRITERS = {
+    'xlsx': write_xlsx,
+    'csv': write_csv,
+    'ndjson': write_ndjson,
+    'parquet': write_parquet,
+}
+
+
+def write_export(queryset, export_format, output, progress=None):
+    """将导出结果写入二进制文件对象，供后台任务使用"""
+    EXPORT_WRITERS[export_format](queryset, output, progress)
@@ -0,0 +1,353 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from pxweb.response_cache import invalidate_tags
+from .duplicates import PHOTO_HASHES_TAG, dhash, to_db
+from .models import Student, StudentPhoto
+from .workers import make_renditions, process_pool
+
+
+logger = logging.getLogger(__name__)
+
+# 缩略图尺寸（最长边像素）、格式和质量，可在 settings 中覆盖
+RENDITION_SIZES = getattr(settings, 'STUDENT_PHOTO_RENDITION_SIZES', (64, 256, 1024))
+RENDITION_FORMAT = getattr(settings, 'STUDENT_PHOTO_RENDITION_FORMAT', 'WEBP')
+RENDITION_QUALITY = getattr(settings, 'STUDENT_PHOTO_RENDITION_QUALITY', 80)
+# 生成缩略图的后台进程数；设为 0 时在当前进程中同步生成（开发、测试环境）
+RENDITION_WORKERS = getattr(settings, 'STUDENT_PHOTO_RENDITION_WORKERS', 2)
+
+# 批量上传时并发校验、写入文件的线程数
+UPLOAD_THREADS = getattr(settings, 'STUDENT_PHOTO_UPLOAD_THREADS', 8)
+# 单张相片大小上限
+MAX_PHOTO_SIZE = 5 * 1024 * 1024
+
+# 上传相片统一缩小到的最长边像素、重新编码的格式和质量
+PHOTO_MAX_DIMENSION = getattr(settings, 'STUDENT_PHOTO_MAX_DIMENSION', 2048)
+PHOTO_FORMAT = getattr(settings, 'STUDENT_PHOTO_FORMAT', 'JPEG')
+PHOTO_QUALITY = getattr(settings, 'STUDENT_PHOTO_QUALITY', 82)
+# 是否另外保存未经处理的原图，用于归档
+KEEP_ORIGINAL_PHOTOS = getattr(settings, 'STUDENT_PHOTO_KEEP_ORIGINALS', False)
+
+# 允许上传的图片格式（以 Pillow 识别的实际格式为准，不看客户端的 Content-Type）
+ACCEPTED_PHOTO_FORMATS = ('JPEG', 'MPO', 'PNG', 'GIF', 'WEBP', 'BMP', 'TIFF')
+
+IMAGE_EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+_pool = None
+
+
+def rendition_name(photo_name, size):
+    """缩略图的存储路径，如 renditions/student_photos/2025/12/04/a_256.webp"""
+    base, _ = os.path.splitext(photo_name)
+    return f'renditions/{base}_{size}.{IMAGE_EXTENSIONS[RENDITION_FORMAT]}'
+
+
+def expected_renditions(photo_name):
+    return {str(size): rendition_name(photo_name, size) for size in RENDITION_SIZES}
+
+
+def convert_for_format(image, image_format):
+    """转换为目标格式支持的颜色模式；JPEG 不支持透明，透明区域填充为白色"""
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    if image_format == 'JPEG':
+        if not has_alpha:
+            return image.convert('RGB')
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    return image
+
+
+def compute_phash(image):
+    """
+    计算相片入库用的感知哈希（有符号整数）
+
+    与上传时的规范化一致：按 EXIF 方向旋转，透明区域填充为白色。上传和为旧相片补算
+    都使用这个函数，同一张图片无论何时入库都得到相同的哈希。
+    """
+    image = ImageOps.exif_transpose(image)
+    return to_db(dhash(convert_for_format(image, 'JPEG')))
+
+
+def photo_hash_from_storage(photo_name):
+    """读取已存储的相片文件并计算感知哈希，用于为旧相片补算"""
+    storage = StudentPhoto._meta.get_field('photo').storage
+    with storage.open(photo_name, 'rb') as f:
+        with Image.open(f) as image:
+            # 计算哈希只需要很小的尺寸，JPEG 可直接按比例解码
+            image.draft('RGB', (256, 256))
+            image.load()
+            return compute_phash(image)
+
+
+def generate_renditions(photo_name):
+    """为一张相片生成全部尺寸的缩略图，返回 {尺寸: 存储路径}"""
+    storage = StudentPhoto._meta.get_field('photo').storage
+    largest = max(RENDITION_SIZES)
+    with storage.open(photo_name, 'rb') as f:
+        image = Image.open(f)
+        # JPEG 可在解码时直接按比例缩小，减少解码耗时和内存
+        image.draft('RGB', (largest, largest))
+        image.load()
+
+    image = convert_for_format(ImageOps.exif_transpose(image), RENDITION_FORMAT)
+
+    renditions = {}
+    for size in sorted(RENDITION_SIZES, reverse=True):
+        # 由大到小逐级缩放，每次都基于上一级结果
+        image.thumbnail((size, size), Image.LANCZOS)
+        output = BytesIO()
+        image.save(output, RENDITION_FORMAT, quality=RENDITION_QUALITY)
+        name = rendition_name(photo_name, size)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        renditions[str(size)] = default_storage.save(name, ContentFile(output.getvalue()))
+    return renditions
+
+
+def create_renditions(photo_id, force=False):
+    """
+    生成并保存指定相片的缩略图
+
+    相片按内容寻址存储，同一文件的缩略图路径相同；已存在时直接复用，force=True 时重新生成。
+    """
+    photo = StudentPhoto.objects.filter(pk=photo_id).only('photo', 'student_id').first()
+    if photo is None or not photo.photo:
+        return
+    renditions = expected_renditions(photo.photo.name)
+    if force or not all(default_storage.exists(name) for name in renditions.values()):
+        renditions = generate_renditions(photo.photo.name)
+    StudentPhoto.objects.filter(pk=photo_id).update(renditions=renditions)
+    Student.objects.filter(pk=photo.student_id).touch()
+    invalidate_tags(f'student:{photo.student_id}')
+
+
+def delete_orphaned_renditions(photo_name, renditions):
+    """相片文件已被删除（没有其他记录引用）时，删除其缩略图"""
+    storage = StudentPhoto._meta.get_field('photo').storage
+    if photo_name and storage.exists(photo_name):
+        return
+    for name in renditions:
+        default_storage.delete(name)
+
+
+def get_rendition_pool():
+    global _pool
+    if _pool is None:
+        _pool = process_pool(RENDITION_WORKERS)
+    return _pool
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logger.error('生成相片缩略图失败: %s', future.exception())
+
+
+def schedule_renditions(photo_ids):
+    """事务提交后在后台进程池中为相片生成缩略图"""
+    photo_ids = list(photo_ids)
+    if not photo_ids:
+        return
+
+    def submit():
+        if not RENDITION_WORKERS:
+            for photo_id in photo_ids:
+                create_renditions(photo_id)
+            return
+        pool = get_rendition_pool()
+        for photo_id in photo_ids:
+            pool.submit(make_renditions, photo_id).add_done_callback(_log_failure)
+
+    transaction.on_commit(submit)
+
+
+def prepare_photo(photo_file):
+    """
+    上传相片的规范化处理，返回需要保存的 StudentPhoto 字段值；无法识别时抛出 ValueError
+
+    用 Pillow 解码确认真实格式，按 EXIF 方向旋转，缩小到最长边不超过 PHOTO_MAX_DIMENSION，
+    再按 PHOTO_FORMAT/PHOTO_QUALITY 重新编码。重新编码时只保留 ICC 色彩配置，
+    EXIF（含拍摄设备、GPS 等）和其他元数据都会被去除。
+
+    返回 {'photo': 处理后的文件, 'phash': 感知哈希}，开启 KEEP_ORIGINAL_PHOTOS 时还包含 'original'。
+    """
+    try:
+        photo_file.seek(0)
+        with Image.open(photo_file) as image:
+            image_format = image.format
+            # JPEG 可在解码时直接按比例缩小，减少解码耗时和内存
+            image.draft('RGB', (PHOTO_MAX_DIMENSION, PHOTO_MAX_DIMENSION))
+            image.load()
+            icc_profile = image.info.get('icc_profile')
+            image = ImageOps.exif_transpose(image)
+    except Exception:
+        raise ValueError('无法识别的图片文件')
+    finally:
+        photo_file.seek(0)
+
+    if image_format not in ACCEPTED_PHOTO_FORMATS:
+        raise ValueError(f'不支持的图片格式: {image_format}')
+
+    image.thumbnail((PHOTO_MAX_DIMENSION, PHOTO_MAX_DIMENSION), Image.LANCZOS)
+    image = convert_for_format(image, PHOTO_FORMAT)
+
+    options = {'quality': PHOTO_QUALITY}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    if PHOTO_FORMAT == 'JPEG':
+        options.update(optimize=True, progressive=True)
+    output = BytesIO()
+    image.save(output, PHOTO_FORMAT, **options)
+
+    base = os.path.splitext(os.path.basename(photo_file.name or ''))[0] or 'photo'
+    fields = {
+        'photo': SimpleUploadedFile(
+            f'{base}.{IMAGE_EXTENSIONS[PHOTO_FORMAT]}',
+            output.getvalue(),
+            content_type=Image.MIME[PHOTO_FORMAT]
+        ),
+        'phash': compute_phash(image),
+    }
+    if KEEP_ORIGINAL_PHOTOS:
+        fields['original'] = photo_file
+    return fields
+
+
+def in_thread(func, *args):
+    """
+    在线程池中执行任务，结束后关闭本线程打开的数据库连接
+
+    写入存储时会更新 StoredBlob 引用计数，每个线程有独立的数据库连接，不关闭会一直占用。
+    """
+    try:
+        return func(*args)
+    finally:
+        connections.close_all()
+
+
+def store_photo_file(student, photo_file):
+    """校验并把上传的相片写入存储，返回 StudentPhoto 的文件字段值"""
+    # 检查文件大小（限制为5MB）
+    if photo_file.size > MAX_PHOTO_SIZE:
+        raise ValueError('文件大小不能超过5MB')
+
+    return save_photo_content(student, photo_file)
+
+
+def save_field_file(instance, field_name, file):
+    field = instance._meta.get_field(field_name)
+    name = field.generate_filename(instance, file.name)
+    return field.storage.save(name, file, max_length=field.max_length)
+
+
+def save_photo_content(student, photo_file):
+    """
+    规范化相片并写入存储
+
+    返回 StudentPhoto 的字段值，文件字段（photo/original）已替换为存储路径。
+    """
+    fields = prepare_photo(photo_file)
+    instance = StudentPhoto(student=student)
+    for field_name in ('photo', 'original'):
+        if field_name in fields:
+            fields[field_name] = save_field_file(instance, field_name, fields[field_name])
+    return fields
+
+
+def bulk_create_photos(photos, primary=False):
+    """
+    用一次 bulk_create 插入已写入存储的相片记录，并安排生成缩略图
+
+    primary=True 时把新相片设为所属学员的主相片（同一学员有多张时取最后一张），
+    与 StudentPhoto.make_primary 一样先锁定学员行。插入失败时释放已写入的文件。
+    """
+    names = [photo.photo.name for photo in photos]
+    originals = [photo.original.name for photo in photos if photo.original]
+    try:
+        with transaction.atomic():
+            if primary:
+                latest = {photo.student_id: photo for photo in photos}
+                for photo in latest.values():
+                    photo.is_primary = True
+                list(
+                    Student.objects.select_for_update()
+                    .filter(pk__in=latest).values_list('pk', flat=True)
+                )
+                StudentPhoto.objects.filter(
+                    student_id__in=latest, is_primary=True
+                ).update(is_primary=False)
+            StudentPhoto.objects.bulk_create(photos)
+            if primary:
+                # MySQL 的 bulk_create 不返回主键，按存储路径查回新的主相片
+                Student.objects.bulk_update([
+                    Student(pk=student_id, primary_photo_id=photo_id)
+                    for student_id, photo_id in StudentPhoto.objects.filter(
+                        student_id__in=latest, photo__in=names, is_primary=True
+                    ).values_list('student_id', 'pk')
+                ], ['primary_photo'])
+    except Exception:
+        storage = StudentPhoto._meta.get_field('photo').storage
+        for name in names + originals:
+            storage.delete(name)
+        raise
+
+    # bulk_create 不触发 post_save，需要单独更新学员版本号、使响应缓存失效、安排生成缩略图
+    student_ids = {photo.student_id for photo in photos}
+    Student.objects.filter(pk__in=student_ids).touch()
+    invalidate_tags(PHOTO_HASHES_TAG, *(f'student:{student_id}' for student_id in student_ids))
+    schedule_renditions(
+        StudentPhoto.objects.filter(photo__in=names).values_list('pk', flat=True)
+    )
+
+
+def save_photo_batch(student, photo_files):
+    """
+    批量保存学员相片
+
+    图片校验和文件写入在线程池中并发执行，全部完成后用一次 bulk_create 插入记录。
+    返回与原接口相同格式的结果统计。
+    """
+    results = {
+        'total': len(photo_files),
+        'success': 0,
+        'failed': 0,
+        'errors': []
+    }
+
+    with ThreadPoolExecutor(max_workers=UPLOAD_THREADS) as pool:
+        futures = [pool.submit(in_thread, store_photo_file, student, f) for f in photo_files]
+
+    photos = []
+    for index, (photo_file, future) in enumerate(zip(photo_files, futures)):
+        error = future.exception()
+        if error is not None:
+            results['failed'] += 1
+            results['errors'].append({
+                'index': index,
+                'filename': photo_file.name,
+                'error': str(error)
+            })
+            continue
+        photos.append(StudentPhoto(
+            student=student,
+            description=f"相片 {index + 1}",
+            **future.result()
+        ))
+
+    if photos:
+        bulk_create_photos(photos)
+        results['success'] = len(photos)
+
+    return results
@@ -0,0 +1,579 @@
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils.dateparse import parse_date
+import pandas as pd
+
+from apps.users.models import User
+from pxweb.response_cache import invalidate_tags
+from .models import Student, StudentSearchDocument
+from .stats import STATS_FIELDS, import_deltas, stats_key, update_counters
+from .suggest import refresh_suggestions
+
+
+# 每个事务批量写入的行数
+IMPORT_CHUNK_SIZE = 500
+
+# 必须存在的列
+REQUIRED_COLUMNS = ['学号', '姓名']
+
+STATUS_MAP = {
+    '在读': 'active',
+    '已毕业': 'graduated',
+    '休学': 'suspended',
+    '退学': 'dropped',
+    'active': 'active',
+    'graduated': 'graduated',
+    'suspended': 'suspended',
+    'dropped': 'dropped',
+}
+
+
+# 有长度限制的字段：字段名 -> (列名, 模型, 模型字段)
+LENGTH_LIMITED_COLUMNS = {
+    'student_id': ('学号', Student, 'student_id'),
+    'department': ('院系', Student, 'department'),
+    'grade': ('年级', Student, 'grade'),
+    'first_name': ('姓名', User, 'first_name'),
+    'last_name': ('姓氏', User, 'last_name'),
+    'username': ('用户名', User, 'username'),
+    'phone': ('电话', User, 'phone'),
+}
+
+
+# 导入模式：create 只新增，学号已存在时报错；upsert 新增或更新已有学员
+IMPORT_MODES = ('create', 'upsert')
+
+# upsert 模式下可更新的字段：字段名 -> 列名
+STUDENT_UPDATE_COLUMNS = {
+    'department': '院系',
+    'grade': '年级',
+    'status': '状态',
+    'enrollment_date': '入学日期',
+    'graduation_date': '毕业日期',
+}
+USER_UPDATE_COLUMNS = {
+    'first_name': '姓名',
+    'last_name': '姓氏',
+    'phone': '电话',
+}
+
+
+def map_status(status_str):
+    """映射状态字符串到数据库值，空值视为在读，无法识别时抛出 ValueError"""
+    if not status_str:
+        return 'active'
+    if status_str not in STATUS_MAP:
+        raise ValueError(f'未知状态: {status_str}')
+    return STATUS_MAP[status_str]
+
+
+def parse_date_value(date_value):
+    """解析日期值，支持多种格式"""
+    if pd.isna(date_value):
+        return ''
+
+    # 如果已经是字符串，直接返回
+    if isinstance(date_value, str):
+        return date_value.strip()
+
+    # 如果是pandas Timestamp 或 datetime 对象，转换为字符串
+    if hasattr(date_value, 'strftime'):
+        try:
+            return date_value.strftime('%Y-%m-%d')
+        except ValueError:
+            return str(date_value)
+
+    # 其他情况转换为字符串
+    return str(date_value)
+
+
+def clean_cell(value):
+    """将单元格值转换为去除首尾空白的字符串，空值返回空字符串"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    # Excel 中的整数列在存在空值时会被读成浮点数，如 2024001.0
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def prepare_row_numbers(df):
+    """未设置行号索引的 DataFrame 按 Excel 行号（从2开始）重建索引"""
+    if isinstance(df.index, pd.RangeIndex) and df.index.start == 0:
+        df = df.set_axis(df.index + 2)
+    return df
+
+
+def import_message(results):
+    """导入结果摘要"""
+    message = f'导入完成，成功: {results["success"]}, 失败: {results["failed"]}'
+    if results['updated'] or results['unchanged']:
+        message += f'（新增: {results["created"]}, 更新: {results["updated"]}, 未变化: {results["unchanged"]}）'
+    return message
+
+
+def max_length(model, field_name):
+    return model._meta.get_field(field_name).max_length
+
+
+def is_valid_email(value):
+    try:
+        validate_email(value)
+    except ValidationError:
+        return False
+    return True
+
+
+class StudentBulkImporter:
+    """
+    学员批量导入
+
+    已有学号和用户名各用一次查询预加载，用户名在内存中分配，
+    合法的行按 chunk_size 分块在事务中 bulk_create 用户和学员。
+    upsert 模式下已存在的学号按块与数据库中的记录比对，只 bulk_update 有变化的字段。
+    """
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE, progress=None, mode='create'):
+        self.chunk_size = chunk_size
+        # 可选回调，每写入一块后以当前结果统计调用
+        self.progress = progress
+        self.mode = mode
+        self.results = {
+            'total': 0,
+            'success': 0,
+            'failed': 0,
+            'created': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'errors': []
+        }
+        self.existing_student_ids = set(
+            Student.objects.values_list('student_id', flat=True)
+        )
+        self.used_usernames = set(
+            User.objects.values_list('username', flat=True)
+        )
+        # 本文件中已出现的学号
+        self.file_student_ids = set()
+        self.pending = []
+
+    def run(self, records):
+        """导入全部记录并返回结果统计"""
+        self.feed(records)
+        return self.finish()
+
+    def feed(self, records):
+        for row_number, record in records:
+            self.results['total'] += 1
+            try:
+                data = self.prepare_row(record)
+            except ValueError as e:
+                self.add_error(row_number, clean_cell(record.get('学号')), str(e))
+                continue
+            self.pending.append((row_number, data))
+            if len(self.pending) >= self.chunk_size:
+                self.flush()
+
+    def finish(self):
+        self.flush()
+        self.report_progress()
+        return self.results
+
+    def add_error(self, row_number, student_id, error):
+        self.results['failed'] += 1
+        self.results['errors'].append({
+            'row': row_number,
+            'student_id': student_id or '未知',
+            'error': error
+        })
+
+    def prepare_row(self, record):
+        """解析并校验一行数据，校验失败时抛出 ValueError"""
+        data = {
+            'student_id': clean_cell(record.get('学号')),
+            'first_name': clean_cell(record.get('姓名')),
+            'last_name': clean_cell(record.get('姓氏')),
+            'username': clean_cell(record.get('用户名')),
+            'email': clean_cell(record.get('邮箱')),
+            'phone': clean_cell(record.get('电话')),
+            'department': clean_cell(record.get('院系')),
+            'grade': clean_cell(record.get('年级')),
+            'status': map_status(clean_cell(record.get('状态'))),
+        }
+
+        # 验证必填字段
+        if not data['student_id']:
+            raise ValueError('学号不能为空')
+        if not data['first_name']:
+            raise ValueError('姓名不能为空')
+
+        # 检查学号是否已存在（包括文件中前面的行）
+        if self.mode == 'upsert':
+            if data['student_id'] in self.file_student_ids:
+                raise ValueError(f'学号 {data["student_id"]} 在文件中重复')
+            exists = data['student_id'] in self.existing_student_ids
+            data['action'] = 'update' if exists else 'create'
+        elif data['student_id'] in self.existing_student_ids:
+            raise ValueError(f'学号 {data["student_id"]} 已存在')
+        else:
+            data['action'] = 'create'
+
+        self.validate_lengths(data)
+
+        if data['email'] and not is_valid_email(data['email']):
+            raise ValueError(f'邮箱格式错误: {data["email"]}')
+
+        # 更新已有学员时，文件中没有的列不做修改
+        data['provided'] = {
+            field for field, column in {**STUDENT_UPDATE_COLUMNS, **USER_UPDATE_COLUMNS}.items()
+            if column in record
+        }
+        if data['action'] == 'create' or '入学日期' in record:
+            data['enrollment_date'] = self.parse_required_date(record.get('入学日期'), '入学日期')
+        data['graduation_date'] = self.parse_optional_date(record.get('毕业日期'), '毕业日期')
+
+        if data['action'] == 'create':
+            data['username'] = self.allocate_username(
+                data['username'] or f"student_{data['student_id']}"
+            )
+            self.existing_student_ids.add(data['student_id'])
+        self.file_student_ids.add(data['student_id'])
+        return data
+
+    def validate_lengths(self, data):
+        for field, (label, model, model_field) in LENGTH_LIMITED_COLUMNS.items():
+            limit = max_length(model, model_field)
+            if len(data[field]) > limit:
+                raise ValueError(f'{label}长度不能超过{limit}个字符')
+
+    def parse_required_date(self, value, label):
+        parsed = self.parse_optional_date(value, label)
+        if parsed is None:
+            raise ValueError(f'{label}不能为空')
+        return parsed
+
+    def parse_optional_date(self, value, label):
+        text = parse_date_value(value)
+        if not text:
+            return None
+        try:
+            parsed = parse_date(text[:10])
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValueError(f'{label}格式错误: {text}')
+        return parsed
+
+    def allocate_username(self, base_username):
+        """在内存中分配唯一用户名，已存在时添加数字后缀"""
+        username = base_username
+        counter = 1
+        while username in self.used_usernames:
+            username = f"{base_username}_{counter}"
+            counter += 1
+        self.used_usernames.add(username)
+        return username
+
+    def release(self, data):
+        """写入失败时释放预占的学号和用户名"""
+        if data['action'] == 'create':
+            self.existing_student_ids.discard(data['student_id'])
+            self.used_usernames.discard(data['username'])
+
+    def flush(self):
+        """在一个事务中批量写入当前缓存的行"""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+
+        try:
+            with transaction.atomic():
+                counts = self.write_rows([data for _, data in pending])
+        except Exception:
+            # 整块写入失败时逐行重试，定位出错的行
+            for row_number, data in pending:
+                try:
+                    with transaction.atomic():
+                        counts = self.write_rows([data])
+                except Exception as e:
+                    self.release(data)
+                    self.add_error(row_number, data['student_id'], f'写入失败: {e}')
+                else:
+                    self.add_counts(counts)
+            self.report_progress()
+            return
+
+        self.add_counts(counts)
+        self.report_progress()
+
+    def add_counts(self, counts):
+        for key, value in counts.items():
+            self.results[key] += value
+        self.results['success'] += sum(counts.values())
+
+    def write_rows(self, rows):
+        """写入一批行，返回新增、更新、未变化的数量"""
+        creates = [data for data in rows if data['action'] == 'create']
+        updates = [data for data in rows if data['action'] == 'update']
+        if creates:
+            self.bulk_insert(creates)
+        updated, unchanged = self.bulk_update_rows(updates) if updates else (0, 0)
+        return {'created': len(creates), 'updated': updated, 'unchanged': unchanged}
+
+    def report_progress(self):
+        if self.progress:
+            self.progress(self.results)
+
+    def bulk_insert(self, rows):
+        users = []
+        for data in rows:
+            user = User(
+                username=data['username'],
+                email=data['email'] or f"{data['username']}@example.com",
+                first_name=data['first_name'],
+                last_name=data['last_name'],
+                phone=data['phone'],
+                user_type='student'
+            )
+            user.set_unusable_password()
+            users.append(user)
+        User.objects.bulk_create(users)
+
+        # MySQL 的 bulk_create 不回填主键，按用户名取回
+        user_ids = dict(
+            User.objects.filter(
+                username__in=[user.username for user in users]
+            ).values_list('username', 'id')
+        )
+
+        Student.objects.bulk_create([
+            Student(
+                user_id=user_ids[data['username']],
+                student_id=data['student_id'],
+                department=data['department'],
+                grade=data['grade'],
+                enrollment_date=data['enrollment_date'],
+                graduation_date=data['graduation_date'],
+                status=data['status'],
+            )
+            for data in rows
+        ])
+        self.refresh_search(
+            Student.objects.filter(student_id__in=[data['student_id'] for data in rows])
+        )
+        update_counters(import_deltas(
+            [tuple(data[field] for field in STATS_FIELDS) for data in rows], []
+        ))
+
+    def bulk_update_rows(self, rows):
+        """
+        与数据库中的学员和用户比对，只更新有变化的字段
+
+        变化字段相同的记录分为一组，每组执行一次 bulk_update。
+        """
+        existing = {
+            student.student_id: student
+            for student in Student.objects.select_related('user').filter(
+                student_id__in=[data['student_id'] for data in rows]
+            )
+        }
+
+        student_groups = defaultdict(list)
+        user_groups = defaultdict(list)
+        updated = unchanged = 0
+        changed = []
+        stats_changes = []
+        for data in rows:
+            student = existing.get(data['student_id'])
+            if student is None:
+                raise ValueError(f'学号 {data["student_id"]} 不存在')
+
+            old_stats_key = stats_key(student)
+            student_changes = self.apply_changes(student, data, STUDENT_UPDATE_COLUMNS)
+            user_changes = self.apply_changes(student.user, data, USER_UPDATE_COLUMNS)
+            if student_changes:
+                student_groups[student_changes].append(student)
+                stats_changes.append((old_stats_key, stats_key(student)))
+            if user_changes:
+                user_groups[user_changes].append(student.user)
+            if student_changes or user_changes:
+                updated += 1
+                changed.append(student.pk)
+            else:
+                unchanged += 1
+
+        for fields, students in student_groups.items():
+            Student.objects.bulk_update(students, fields)
+        for fields, users in user_groups.items():
+            User.objects.bulk_update(users, fields)
+        if changed:
+            self.refresh_search(Student.objects.filter(pk__in=changed))
+        update_counters(import_deltas([], stats_changes))
+        return updated, unchanged
+
+    def refresh_search(self, students):
+        """批量写入不触发信号，单独更新搜索文档、输入提示索引、版本号和响应缓存"""
+        StudentSearchDocument.objects.refresh(students)
+        students.touch()
+        student_ids = list(students.values_list('pk', 'user_id'))
+        refresh_suggestions(pk for pk, _ in student_ids)
+        invalidate_tags(*(
+            tag for pk, user_id in student_ids for tag in (f'student:{pk}', f'user:{user_id}')
+        ))
+
+    def apply_changes(self, obj, data, columns):
+        """将导入值写入对象，返回发生变化的字段名元组"""
+        changed = []
+        for field in columns:
+            if field in data['provided'] and getattr(obj, field) != data[field]:
+                setattr(obj, field, data[field])
+                changed.append(field)
+        return tuple(changed)
+
+
+def clean_series(series):
+    """clean_cell 的向量化版本，返回去除空白的字符串列，空值为空字符串"""
+    if pd.api.types.is_float_dtype(series):
+        values = series.dropna()
+        if (values % 1 == 0).all():
+            series = series.astype('Int64')
+    return series.astype('string').fillna('').str.strip()
+
+
+def validate_batches(batches, columns, mode='create'):
+    """
+    预检导入数据（dry run），不写入数据库
+
+    逐批调用 validate_dataframe 并汇总结果；已有学号只查询一次，
+    文件内的重复学号跨批次检测。
+    """
+    existing = set(Student.objects.values_list('student_id', flat=True))
+    seen = set()
+    results = {
+        'total': 0,
+        'success': 0,
+        'failed': 0,
+        'errors': [],
+        'missing_columns': [col for col in REQUIRED_COLUMNS if col not in columns],
+    }
+    for batch in batches:
+        batch_results = validate_dataframe(batch, existing=existing, seen=seen, mode=mode)
+        for key in ('total', 'success', 'failed', 'errors'):
+            results[key] += batch_results[key]
+    return results
+
+
+def validate_dataframe(df, existing=None, seen=None, mode='create'):
+    """
+    预检一批导入数据，不写入数据库
+
+    全部校验以 pandas 列运算完成，一次性报告所有问题，
+    错误格式与正式导入相同：{'row', 'student_id', 'error'}。
+    DataFrame 的索引为 Excel 行号；existing 为数据库中已有的学号，
+    seen 为之前批次中出现过的学号，校验后会加入本批学号。
+    upsert 模式下学号已存在不视为错误。
+    """
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    df = prepare_row_numbers(df)
+    if existing is None:
+        existing = set(Student.objects.values_list('student_id', flat=True))
+    if seen is None:
+        seen = set()
+    empty = pd.Series('', index=df.index, dtype='string')
+
+    def column(name):
+        return clean_series(df[name]) if name in df.columns else empty
+
+    row_numbers = pd.Series(df.index, index=df.index)
+    student_ids = column('学号')
+    student_id_display = student_ids.mask(student_ids == '', '未知')
+    problems = []
+
+    def report(mask, message):
+        mask = mask.fillna(False).astype(bool)
+        if not mask.any():
+            return
+        if not isinstance(message, pd.Series):
+            message = pd.Series(message, index=df.index)
+        problems.append(pd.DataFrame({
+            'row': row_numbers[mask],
+            'student_id': student_id_display[mask],
+            'error': message[mask],
+        }))
+
+    # 必填字段
+    report(student_ids == '', '学号不能为空')
+    report(column('姓名') == '', '姓名不能为空')
+
+    # 学号重复：文件内部 / 数据库中已存在
+    present = student_ids != ''
+    report(
+        present & (student_ids.duplicated(keep='first') | student_ids.isin(seen)),
+        '学号 ' + student_ids + ' 在文件中重复'
+    )
+    seen.update(student_ids[present])
+    if mode != 'upsert':
+        report(
+            present & student_ids.isin(existing),
+            '学号 ' + student_ids + ' 已存在'
+        )
+
+    # 字段长度
+    for field, (label, model, model_field) in LENGTH_LIMITED_COLUMNS.items():
+        limit = max_length(model, model_field)
+        report(column(label).str.len() > limit, f'{label}长度不能超过{limit}个字符')
+
+    # 日期
+    for label, required in (('入学日期', True), ('毕业日期', False)):
+        text = column(label).str.slice(0, 10)
+        parsed = pd.to_datetime(
+            text.where(text.str.fullmatch(r'\d{4}-\d{1,2}-\d{1,2}').fillna(False)),
+            format='%Y-%m-%d',
+            errors='coerce'
+        )
+        blank = text == ''
+        if required:
+            needed = blank
+            # upsert 时文件没有该列，则只有新增的学员必须提供
+            if mode == 'upsert' and label not in df.columns:
+                needed = blank & ~student_ids.isin(existing)
+            report(needed, f'{label}不能为空')
+        report(~blank & parsed.isna(), f'{label}格式错误: ' + column(label))
+
+    # 状态
+    statuses = column('状态')
+    report(
+        (statuses != '') & ~statuses.isin(list(STATUS_MAP)),
+        '未知状态: ' + statuses
+    )
+
+    # 邮箱：每个不同的值只校验一次
+    emails = column('邮箱')
+    distinct = emails[emails != ''].unique()
+    valid_emails = {value: is_valid_email(value) for value in distinct}
+    report(
+        (emails != '') & ~emails.map(valid_emails).fillna(True).astype(bool),
+        '邮箱格式错误: ' + emails
+    )
+
+    if problems:
+        errors = pd.concat(problems).sort_values('row', kind='stable')
+        failed = errors['row'].nunique()
+        errors = [
+            {'row': int(row), 'student_id': str(sid), 'error': str(error)}
+            for row, sid, error in errors.itertuples(index=False)
+        ]
+    else:
+        failed = 0
+        errors = []
+
+    return {
+        'total': len(df),
+        'success': len(df) - failed,
+        'failed': failed,
+        'errors': errors,
+        'missing_columns': missing_columns,
+    }
@@ -0,0 +1,163 @@
+import tempfile
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .exports import export_filename, write_export
+from .importers import REQUIRED_COLUMNS, StudentBulkImporter, import_message
+from .models import STUDENT_FILTER_PARAMS, Student, StudentJob
+from .readers import StudentFileReader
+
+
+# 任务心跳超时（秒）：运行中的任务超过这么久没有更新心跳，视为所属 worker 已退出
+JOB_HEARTBEAT_TIMEOUT = getattr(settings, 'STUDENT_JOB_HEARTBEAT_TIMEOUT', 60)
+
+
+def update_job(job, **fields):
+    """只更新指定字段，避免覆盖其他进程写入的进度"""
+    StudentJob.objects.filter(pk=job.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def claim_pending_jobs(limit, worker_id):
+    """
+    领取最多 limit 个等待中的任务
+
+    通过带状态条件的 UPDATE 抢占，多个 worker 同时运行时同一任务只会被领取一次。
+    领取时记录 worker_id 和心跳时间，之后由该 worker 定期调用 heartbeat_jobs 更新心跳。
+    """
+    claimed = []
+    pending = StudentJob.objects.filter(status='pending').order_by('created_at')
+    for pk in pending.values_list('pk', flat=True)[:limit]:
+        now = timezone.now()
+        updated = StudentJob.objects.filter(pk=pk, status='pending').update(
+            status='running',
+            started_at=now,
+            worker_id=worker_id,
+            heartbeat_at=now
+        )
+        if updated:
+            claimed.append(pk)
+    return claimed
+
+
+def heartbeat_jobs(worker_id, job_ids):
+    """更新本 worker 正在执行的任务的心跳时间"""
+    if job_ids:
+        StudentJob.objects.filter(
+            pk__in=job_ids, worker_id=worker_id, status='running'
+        ).update(heartbeat_at=timezone.now())
+
+
+def fail_stale_jobs(worker_id=None):
+    """
+    将已中断的运行中任务标记为失败
+
+    包括心跳超时的任务（所属 worker 已退出），以及给定 worker_id 时该 worker
+    上次未完成的任务（以相同 ID 重启）。其他仍在运行的 worker 的任务不受影响。
+    """
+    expired = timezone.now() - timedelta(seconds=JOB_HEARTBEAT_TIMEOUT)
+    stale = Q(heartbeat_at__lt=expired) | Q(heartbeat_at__isnull=True)
+    if worker_id:
+        stale |= Q(worker_id=worker_id)
+    return StudentJob.objects.filter(stale, status='running').update(
+        status='failed',
+        message='任务执行中断（worker 已退出）',
+        finished_at=timezone.now()
+    )
+
+
+def fail_job(job_id, message):
+    """工作进程异常退出、未能自行记录结果时，将任务标记为失败"""
+    return StudentJob.objects.filter(pk=job_id, status='running').update(
+        status='failed',
+        message=message,
+        finished_at=timezone.now()
+    )
+
+
+def run_job(job_id):
+    """执行一个任务，异常时记录失败信息"""
+    job = StudentJob.objects.get(pk=job_id)
+    try:
+        if job.job_type == 'import':
+            run_import_job(job)
+        else:
+            run_export_job(job)
+    except Exception as e:
+        traceback.print_exc()
+        update_job(
+            job,
+            status='failed',
+            message=f'任务执行失败: {e}',
+            finished_at=timezone.now()
+        )
+    finally:
+        connections.close_all()
+
+
+def run_import_job(job):
+    with job.input_file.open('rb') as f:
+        reader = StudentFileReader(f, job.input_file.name)
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in reader.columns]
+        if missing_columns:
+            reader.close()
+            raise ValueError(f'文件缺少必要的列: {", ".join(missing_columns)}')
+        if reader.estimated_total is not None:
+            update_job(job, total=reader.estimated_total)
+        results = import_records(job, reader.records(), job.params.get('mode', 'create'))
+
+    update_job(
+        job,
+        status='completed',
+        total=results['total'],
+        processed=results['total'],
+        success_count=results['success'],
+        failed_count=results['failed'],
+        errors=results['errors'],
+        message=import_message(results),
+        finished_at=timezone.now()
+    )
+
+
+def import_records(job, records, mode):
+    def progress(results):
+        update_job(
+            job,
+            processed=results['total'],
+            success_count=results['success'],
+            failed_count=results['failed']
+        )
+
+    return StudentBulkImporter(progress=progress, mode=mode).run(records)
+
+
+def run_export_job(job):
+    params = job.params
+    export_format = params.get('format', 'xlsx')
+    students = Student.objects.filter_by_params(
+        **{key: params.get(key, '') for key in STUDENT_FILTER_PARAMS}
+    )
+    update_job(job, total=students.count())
+
+    def progress(rows):
+        update_job(job, processed=job.processed + rows, success_count=job.processed + rows)
+
+    with tempfile.TemporaryFile() as output:
+        write_export(students, export_format, output, progress)
+        output.seek(0)
+        job.result_file.save(export_filename(export_format), File(output), save=False)
+
+    update_job(
+        job,
+        status='completed',
+        result_file=job.result_file.name,
+        message=f'导出完成，共 {job.processed} 条',
+        finished_at=timezone.now()
+    )
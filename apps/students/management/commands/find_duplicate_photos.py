@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from apps.students.duplicates import (
+    DEFAULT_THRESHOLD, PHOTO_HASHES_TAG, duplicate_photo_clusters
+)
+from apps.students.images import photo_hash_from_storage
+from apps.students.models import StudentPhoto
+from pxweb.response_cache import invalidate_tags
+
+
+class Command(BaseCommand):
+    help = '查找近似重复的学员相片（基于感知哈希）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=int, default=DEFAULT_THRESHOLD,
+            help=f'允许的最大汉明距离（默认 {DEFAULT_THRESHOLD}）'
+        )
+        parser.add_argument(
+            '--per-student', action='store_true',
+            help='只比较同一学员的相片（默认在全部相片中查找）'
+        )
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help='先为缺少感知哈希的已有相片计算哈希'
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            self.backfill()
+
+        clusters = duplicate_photo_clusters(
+            StudentPhoto.objects.all(),
+            threshold=options['threshold'],
+            per_student=options['per_student']
+        )
+        rows = StudentPhoto.objects.filter(
+            pk__in=[photo_id for cluster in clusters for photo_id in cluster]
+        ).values_list('pk', 'student__student_id', 'photo')
+        details = {pk: (student_id, name) for pk, student_id, name in rows}
+
+        for index, cluster in enumerate(clusters, start=1):
+            self.stdout.write(f'第 {index} 组（{len(cluster)} 张）:')
+            for photo_id in cluster:
+                student_id, name = details.get(photo_id, ('-', '-'))
+                self.stdout.write(f'  #{photo_id}  学号 {student_id}  {name}')
+
+        self.stdout.write(self.style.SUCCESS(f'共找到 {len(clusters)} 组近似重复的相片'))
+
+    def backfill(self, batch_size=500):
+        photos = StudentPhoto.objects.filter(phash__isnull=True).exclude(photo='')
+        pending = list(photos.values_list('pk', 'photo'))
+        self.stdout.write(f'共 {len(pending)} 张相片需要计算感知哈希')
+        for start in range(0, len(pending), batch_size):
+            updated = []
+            for pk, name in pending[start:start + batch_size]:
+                try:
+                    updated.append(StudentPhoto(pk=pk, phash=photo_hash_from_storage(name)))
+                except Exception as e:
+                    self.stderr.write(f'相片 #{pk} 计算失败: {e}')
+            StudentPhoto.objects.bulk_update(updated, ['phash'])
+        # 补算的哈希使接口缓存的查重结果失效
+        invalidate_tags(PHOTO_HASHES_TAG)
@@ -0,0 +1,49 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from apps.students.images import expected_renditions
+from apps.students.models import StudentPhoto
+from apps.students.workers import make_renditions, process_pool
+
+
+class Command(BaseCommand):
+    help = '为已有的学员相片批量生成缩略图'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='工作进程数（默认 4）'
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='重新生成全部缩略图（默认只处理缺少缩略图的相片）'
+        )
+
+    def handle(self, *args, **options):
+        photo_ids = [
+            pk for pk, name, renditions in
+            StudentPhoto.objects.values_list('pk', 'photo', 'renditions').iterator()
+            if name and (options['all'] or renditions != expected_renditions(name))
+        ]
+        if not photo_ids:
+            self.stdout.write('没有需要生成缩略图的相片')
+            return
+
+        self.stdout.write(f'共 {len(photo_ids)} 张相片需要生成缩略图')
+        failed = 0
+        with process_pool(options['workers']) as pool:
+            futures = {
+                pool.submit(make_renditions, pk, options['all']): pk
+                for pk in photo_ids
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                if future.exception() is not None:
+                    failed += 1
+                    self.stderr.write(f'相片 #{futures[future]} 生成失败: {future.exception()}')
+                if done % 100 == 0:
+                    self.stdout.write(f'已处理 {done}/{len(photo_ids)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'缩略图生成完成，成功: {len(photo_ids) - failed}, 失败: {failed}'
+        ))
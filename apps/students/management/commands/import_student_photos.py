@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.students.archives import ARCHIVE_BATCH_SIZE, import_photo_archive
+from apps.students.images import UPLOAD_THREADS
+
+
+class Command(BaseCommand):
+    help = '从ZIP压缩包批量导入学员相片，压缩包中的文件以学号命名'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archive', help='ZIP压缩包路径')
+        parser.add_argument(
+            '--primary', action='store_true',
+            help='将导入的相片设为学员的主相片'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=UPLOAD_THREADS,
+            help=f'并发解压、写入的线程数（默认 {UPLOAD_THREADS}）'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+            help=f'每批插入的记录数（默认 {ARCHIVE_BATCH_SIZE}）'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archive'], 'rb') as f:
+                results = import_photo_archive(
+                    f,
+                    primary=options['primary'],
+                    batch_size=options['batch_size'],
+                    threads=options['threads']
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in results['errors']:
+            self.stderr.write(f'{error["filename"]}: {error["error"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'相片导入完成，共 {results["total"]} 个文件，'
+            f'成功: {results["success"]}, 失败: {results["failed"]}'
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.students.models import Student, StudentSearchDocument
+
+
+class Command(BaseCommand):
+    help = '重建全部学员的搜索文档（绕过信号直接修改数据库后使用）'
+
+    def handle(self, *args, **options):
+        students = Student.objects.all()
+        StudentSearchDocument.objects.refresh(students)
+        self.stdout.write(self.style.SUCCESS(f'已重建 {students.count()} 个学员的搜索文档'))
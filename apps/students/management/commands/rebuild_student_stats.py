@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.students.models import StudentStatsCounter
+from apps.students.stats import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = '按学员表重新计算统计计数（绕过信号直接修改数据库后使用）'
+
+    def handle(self, *args, **options):
+        rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'已重建 {StudentStatsCounter.objects.count()} 个统计分组'
+        ))
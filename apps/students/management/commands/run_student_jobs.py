@@ -0,0 +1,80 @@
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from apps.students.jobs import claim_pending_jobs, fail_job, fail_stale_jobs, heartbeat_jobs
+from apps.students.workers import execute_job, process_pool
+
+
+class Command(BaseCommand):
+    help = '启动学员导入导出后台任务进程池'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='工作进程数（默认 2）'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='轮询任务表的间隔秒数（默认 2）'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='处理完当前所有等待中的任务后退出'
+        )
+        parser.add_argument(
+            '--worker-id', default='',
+            help='本 worker 的标识（默认 主机名:进程号）；使用固定标识时，'
+                 '重启后立即将上次未完成的任务标记为失败，否则等待心跳超时'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        poll_interval = options['poll_interval']
+        worker_id = options['worker_id'] or f'{socket.gethostname()}:{os.getpid()}'
+
+        stale = fail_stale_jobs(worker_id)
+        if stale:
+            self.stdout.write(self.style.WARNING(f'已将 {stale} 个中断的任务标记为失败'))
+
+        self.stdout.write(f'后台任务进程池已启动（{worker_id}），工作进程数: {workers}')
+        with process_pool(workers) as pool:
+            # future -> 任务ID
+            running = {}
+            stopping = False
+            while True:
+                try:
+                    self.collect_finished(running)
+                    if not stopping and workers > len(running):
+                        for job_id in claim_pending_jobs(workers - len(running), worker_id):
+                            self.stdout.write(f'开始执行任务 #{job_id}')
+                            running[pool.submit(execute_job, job_id)] = job_id
+                    heartbeat_jobs(worker_id, list(running.values()))
+                    fail_stale_jobs()
+                except DatabaseError as e:
+                    # 数据库暂时不可用时关闭连接，下次轮询重新连接
+                    self.stderr.write(f'访问任务表失败: {e}')
+                    connections.close_all()
+
+                if (options['once'] or stopping) and not running:
+                    break
+                try:
+                    time.sleep(poll_interval)
+                except KeyboardInterrupt:
+                    if stopping:
+                        raise
+                    # 等待期间继续更新心跳，避免运行中的任务被其他 worker 判定为中断
+                    self.stdout.write('正在等待运行中的任务结束...')
+                    stopping = True
+
+        self.stdout.write(self.style.SUCCESS('后台任务进程池已停止'))
+
+    def collect_finished(self, running):
+        for future in [future for future in running if future.done()]:
+            job_id = running.pop(future)
+            if future.exception() is not None:
+                self.stderr.write(f'任务 #{job_id} 的工作进程异常退出: {future.exception()}')
+                fail_job(job_id, f'任务执行中断: {future.exception()}')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from apps.students.storage import content_addressed_storage
+
+
+class Command(BaseCommand):
+    help = '清理没有 StoredBlob 记录的存储文件（事务回滚后残留）和中断上传留下的临时文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=24 * 3600,
+            help='只清理修改时间早于这么多秒之前的文件（默认 86400）'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='只列出将被删除的文件'
+        )
+
+    def handle(self, *args, **options):
+        orphans = content_addressed_storage.orphaned_files(options['min_age'])
+        for name in orphans:
+            self.stdout.write(f'  {name}')
+            if not options['dry_run']:
+                content_addressed_storage.remove_orphan(name)
+
+        action = '将删除' if options['dry_run'] else '已删除'
+        self.stdout.write(self.style.SUCCESS(f'{action} {len(orphans)} 个残留文件'))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_studentphoto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='student',
+            options={'ordering': ['-created_at', 'id'], 'verbose_name': '学员', 'verbose_name_plural': '学员'},
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['-created_at', 'id'], name='student_created_id_idx'),
+        ),
+    ]
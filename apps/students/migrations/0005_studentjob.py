@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_student_cursor_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(choices=[('import', '导入'), ('export', '导出')], max_length=10, verbose_name='任务类型')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '进行中'), ('completed', '已完成'), ('failed', '失败')], db_index=True, default='pending', max_length=10, verbose_name='状态')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='任务参数')),
+                ('input_file', models.FileField(blank=True, null=True, upload_to='student_jobs/input/', verbose_name='上传文件')),
+                ('result_file', models.FileField(blank=True, null=True, upload_to='student_jobs/results/', verbose_name='结果文件')),
+                ('total', models.IntegerField(default=0, verbose_name='总行数')),
+                ('processed', models.IntegerField(default=0, verbose_name='已处理行数')),
+                ('success_count', models.IntegerField(default=0, verbose_name='成功数')),
+                ('failed_count', models.IntegerField(default=0, verbose_name='失败数')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='错误明细')),
+                ('message', models.TextField(blank=True, verbose_name='结果信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='student_jobs', to=settings.AUTH_USER_MODEL, verbose_name='创建者')),
+            ],
+            options={
+                'verbose_name': '学员导入导出任务',
+                'verbose_name_plural': '学员导入导出任务',
+                'db_table': 'students_studentjob',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
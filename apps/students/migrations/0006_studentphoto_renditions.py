@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0005_studentjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentphoto',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, verbose_name='缩略图'),
+        ),
+    ]
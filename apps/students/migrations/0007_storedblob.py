@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:59
+
+import apps.students.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_studentphoto_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='存储路径')),
+                ('size', models.BigIntegerField(default=0, verbose_name='文件大小')),
+                ('ref_count', models.PositiveIntegerField(default=1, verbose_name='引用次数')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '文件存储',
+                'verbose_name_plural': '文件存储',
+                'db_table': 'students_storedblob',
+            },
+        ),
+        migrations.AlterField(
+            model_name='studentachievement',
+            name='certificate_file',
+            field=models.FileField(blank=True, null=True, storage=apps.students.storage.ContentAddressedStorage(), upload_to='student_achievements/', verbose_name='证书文件'),
+        ),
+        migrations.AlterField(
+            model_name='studentphoto',
+            name='photo',
+            field=models.ImageField(storage=apps.students.storage.ContentAddressedStorage(), upload_to='student_photos/%Y/%m/%d/', verbose_name='相片'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_primary_photo(apps, schema_editor):
+    """每个学员只保留最新的一张主相片，并写入 Student.primary_photo"""
+    Student = apps.get_model('students', 'Student')
+    StudentPhoto = apps.get_model('students', 'StudentPhoto')
+    primary = {}
+    for pk, student_id in (
+        StudentPhoto.objects.filter(is_primary=True)
+        .order_by('uploaded_at', 'pk')
+        .values_list('pk', 'student_id')
+    ):
+        primary[student_id] = pk
+    StudentPhoto.objects.filter(is_primary=True).exclude(
+        pk__in=primary.values()
+    ).update(is_primary=False)
+    for student_id, photo_id in primary.items():
+        Student.objects.filter(pk=student_id).update(primary_photo_id=photo_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_storedblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='primary_photo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='students.studentphoto', verbose_name='主相片'),
+        ),
+        migrations.RunPython(fill_primary_photo, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='studentphoto',
+            constraint=models.UniqueConstraint(models.Case(models.When(is_primary=True, then=models.F('student'))), name='student_single_primary_photo'),
+        ),
+    ]
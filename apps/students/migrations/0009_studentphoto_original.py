@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:07
+
+import apps.students.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0008_student_primary_photo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentphoto',
+            name='original',
+            field=models.FileField(blank=True, storage=apps.students.storage.ContentAddressedStorage(), upload_to='student_photos/originals/%Y/%m/%d/', verbose_name='原图'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apps.students.search import create_search_index, drop_search_index, write_search_documents
+
+
+def add_search_index(apps, schema_editor):
+    create_search_index(schema_editor)
+
+
+def remove_search_index(apps, schema_editor):
+    drop_search_index(schema_editor)
+
+
+def fill_search_documents(apps, schema_editor):
+    """为已有学员生成搜索文档"""
+    Student = apps.get_model('students', 'Student')
+    StudentSearchDocument = apps.get_model('students', 'StudentSearchDocument')
+    write_search_documents(StudentSearchDocument, Student.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0010_studentphoto_phash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSearchDocument',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='students.student', verbose_name='学员')),
+                ('document', models.TextField(verbose_name='搜索文本')),
+            ],
+            options={
+                'verbose_name': '学员搜索文档',
+                'verbose_name_plural': '学员搜索文档',
+                'db_table': 'students_studentsearch',
+            },
+        ),
+        migrations.RunPython(add_search_index, remove_search_index),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:19
+
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    """按已有学员生成计数"""
+    Student = apps.get_model('students', 'Student')
+    StudentStatsCounter = apps.get_model('students', 'StudentStatsCounter')
+    rows = Student.objects.order_by().values('status', 'department', 'grade').annotate(
+        count=models.Count('pk')
+    )
+    StudentStatsCounter.objects.bulk_create([StudentStatsCounter(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0011_studentsearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentStatsCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=10, verbose_name='状态')),
+                ('department', models.CharField(blank=True, max_length=200, verbose_name='院系')),
+                ('grade', models.CharField(blank=True, max_length=100, verbose_name='年级')),
+                ('count', models.IntegerField(default=0, verbose_name='人数')),
+            ],
+            options={
+                'verbose_name': '学员统计计数',
+                'verbose_name_plural': '学员统计计数',
+                'db_table': 'students_statscounter',
+                'constraints': [models.UniqueConstraint(fields=('status', 'department', 'grade'), name='student_stats_bucket')],
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def fill_updated_at(apps, schema_editor):
+    """已有学员的修改时间取创建时间"""
+    Student = apps.get_model('students', 'Student')
+    Student.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0012_studentstatscounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='更新时间'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='version',
+            field=models.PositiveIntegerField(default=1, verbose_name='版本号'),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
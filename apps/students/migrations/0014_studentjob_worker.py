@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0013_student_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='最近心跳'),
+        ),
+        migrations.AddField(
+            model_name='studentjob',
+            name='worker_id',
+            field=models.CharField(blank=True, max_length=100, verbose_name='执行进程'),
+        ),
+    ]
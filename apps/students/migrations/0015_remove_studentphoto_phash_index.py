@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0014_studentjob_worker'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentphoto',
+            name='phash',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='感知哈希'),
+        ),
+    ]
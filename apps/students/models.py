@@ -1,5 +1,69 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from apps.users.models import User
+from .search import search_condition, write_search_documents
+from .storage import content_addressed_storage
+
+
+# 学员列表、导出等接口共用的过滤参数
+STUDENT_FILTER_PARAMS = ('search', 'status', 'department', 'grade')
+
+
+class StudentQuerySet(models.QuerySet):
+    def filter_by_params(self, search='', status='', department='', grade=''):
+        """按学员列表的搜索、状态、院系和年级条件过滤"""
+        queryset = self
+        
+        # 搜索功能：查询搜索文档的全文索引，支持姓名拼音和首字母
+        if search:
+            queryset = queryset.filter(search_condition(search))
+        
+        # 状态过滤
+        if status:
+            queryset = queryset.filter(status=status)
+        
+        # 院系过滤
+        if department:
+            queryset = queryset.filter(department__icontains=department)
+        
+        # 年级过滤
+        if grade:
+            queryset = queryset.filter(grade=grade)
+        
+        return queryset
+    
+    def touch(self):
+        """递增版本号并更新修改时间；联系信息、成就、相片等子记录变化时调用"""
+        return self.update(version=models.F('version') + 1, updated_at=timezone.now())
+    
+    def for_serializer(self, fields=None):
+        """
+        预加载 StudentSerializer 所需的关联数据，避免 N+1 查询
+        
+        fields 为需要输出的字段集合，None 表示全部字段；未请求的关联不会被加载。
+        """
+        def wanted(name):
+            return fields is None or name in fields
+        
+        queryset = self
+        related = [
+            name for name in ('user', 'contact_info', 'primary_photo') if wanted(name)
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+        
+        prefetches = []
+        if wanted('achievements'):
+            prefetches.append(
+                models.Prefetch('achievements', queryset=StudentAchievement.objects.all())
+            )
+        if wanted('photos'):
+            prefetches.append(
+                models.Prefetch('photos', queryset=StudentPhoto.objects.all())
+            )
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset
 
 
 class Student(models.Model):
@@ -36,12 +100,30 @@ class Student(models.Model):
         verbose_name='状态'
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    # 学员本身或其联系信息、成就、相片、用户信息变化时更新，用于 ETag/Last-Modified 条件请求
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+    version = models.PositiveIntegerField(default=1, verbose_name='版本号')
+    # 主相片，与 StudentPhoto.is_primary 同步，由 StudentPhoto.make_primary 维护
+    primary_photo = models.ForeignKey(
+        'StudentPhoto',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='主相片'
+    )
+    
+    objects = StudentQuerySet.as_manager()
     
     class Meta:
         db_table = 'students_student'
         verbose_name = '学员'
         verbose_name_plural = verbose_name
-        ordering = ['-created_at']
+        ordering = ['-created_at', 'id']
+        indexes = [
+            # 支持按 (-created_at, id) 的游标分页
+            models.Index(fields=['-created_at', 'id'], name='student_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student_id} - {self.user.username}"
@@ -109,6 +191,7 @@ class StudentAchievement(models.Model):
     date_achieved = models.DateField(verbose_name='获得日期')
     certificate_file = models.FileField(
         upload_to='student_achievements/',
+        storage=content_addressed_storage,
         blank=True,
         null=True,
         verbose_name='证书文件'
@@ -135,8 +218,15 @@ class StudentPhoto(models.Model):
     )
     photo = models.ImageField(
         upload_to='student_photos/%Y/%m/%d/',
+        storage=content_addressed_storage,
         verbose_name='相片'
     )
+    original = models.FileField(
+        upload_to='student_photos/originals/%Y/%m/%d/',
+        storage=content_addressed_storage,
+        blank=True,
+        verbose_name='原图'
+    )
     description = models.CharField(
         max_length=200,
         blank=True,
@@ -146,6 +236,18 @@ class StudentPhoto(models.Model):
         default=False,
         verbose_name='是否为主相片'
     )
+    renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='缩略图'
+    )
+    # 64 位 dHash（按有符号整数保存），用于查找近似重复的相片；
+    # 按汉明距离比较无法利用普通索引，查重结果缓存见 duplicates.cached_photo_clusters
+    phash = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='感知哈希'
+    )
     uploaded_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='上传时间'
@@ -156,12 +258,187 @@ class StudentPhoto(models.Model):
         verbose_name = '学员相片'
         verbose_name_plural = verbose_name
         ordering = ['-uploaded_at']
+        constraints = [
+            # 每个学员最多一张主相片；非主相片的表达式值为 NULL，不参与唯一性比较。
+            # 用表达式索引而不是 condition，MySQL 8.0.13+ 同样支持
+            models.UniqueConstraint(
+                models.Case(models.When(is_primary=True, then=models.F('student'))),
+                name='student_single_primary_photo'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.student.user.username} 的相片"
     
+    def make_primary(self):
+        """
+        设为所属学员的主相片
+        
+        锁定学员行后再切换，同一学员的并发切换依次执行，不会出现多张主相片。
+        """
+        with transaction.atomic():
+            Student.objects.select_for_update().only('pk').get(pk=self.student_id)
+            StudentPhoto.objects.filter(
+                student_id=self.student_id, is_primary=True
+            ).exclude(pk=self.pk).update(is_primary=False)
+            StudentPhoto.objects.filter(pk=self.pk).update(is_primary=True)
+            Student.objects.filter(pk=self.student_id).update(primary_photo=self)
+        self.is_primary = True
+    
+    def clear_primary(self):
+        """取消主相片"""
+        with transaction.atomic():
+            Student.objects.select_for_update().only('pk').get(pk=self.student_id)
+            StudentPhoto.objects.filter(pk=self.pk).update(is_primary=False)
+            Student.objects.filter(
+                pk=self.student_id, primary_photo=self
+            ).update(primary_photo=None)
+        self.is_primary = False
+    
     def get_photo_url(self):
         """获取相片URL"""
         if self.photo:
             return self.photo.url
         return None
+
+
+class StudentSearchQuerySet(models.QuerySet):
+    def refresh(self, students):
+        """重建给定学员查询集的搜索文档"""
+        write_search_documents(self.model, students)
+
+
+class StudentSearchDocument(models.Model):
+    """学员的去规范化搜索文本，由信号和批量导入同步维护"""
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        verbose_name='学员'
+    )
+    document = models.TextField(verbose_name='搜索文本')
+    
+    objects = StudentSearchQuerySet.as_manager()
+    
+    class Meta:
+        db_table = 'students_studentsearch'
+        verbose_name = '学员搜索文档'
+        verbose_name_plural = verbose_name
+    
+    def __str__(self):
+        return self.document
+
+
+class StudentStatsCounter(models.Model):
+    """按 状态×院系×年级 维护的学员人数，由信号和批量导入增量更新，统计接口不扫描学员表"""
+    status = models.CharField(max_length=10, verbose_name='状态')
+    department = models.CharField(max_length=200, blank=True, verbose_name='院系')
+    grade = models.CharField(max_length=100, blank=True, verbose_name='年级')
+    count = models.IntegerField(default=0, verbose_name='人数')
+    
+    class Meta:
+        db_table = 'students_statscounter'
+        verbose_name = '学员统计计数'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(
+                fields=['status', 'department', 'grade'], name='student_stats_bucket'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.status}/{self.department}/{self.grade}: {self.count}"
+
+
+class StoredBlob(models.Model):
+    """按内容去重存储的文件及其引用次数"""
+    digest = models.CharField(max_length=64, unique=True, verbose_name='SHA-256')
+    name = models.CharField(max_length=255, unique=True, verbose_name='存储路径')
+    size = models.BigIntegerField(default=0, verbose_name='文件大小')
+    ref_count = models.PositiveIntegerField(default=1, verbose_name='引用次数')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    
+    class Meta:
+        db_table = 'students_storedblob'
+        verbose_name = '文件存储'
+        verbose_name_plural = verbose_name
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+
+class StudentJob(models.Model):
+    """学员导入导出后台任务"""
+    JOB_TYPES = (
+        ('import', '导入'),
+        ('export', '导出'),
+    )
+    STATUS_CHOICES = (
+        ('pending', '等待中'),
+        ('running', '进行中'),
+        ('completed', '已完成'),
+        ('failed', '失败'),
+    )
+    
+    job_type = models.CharField(
+        max_length=10,
+        choices=JOB_TYPES,
+        verbose_name='任务类型'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending',
+        db_index=True,
+        verbose_name='状态'
+    )
+    params = models.JSONField(default=dict, blank=True, verbose_name='任务参数')
+    input_file = models.FileField(
+        upload_to='student_jobs/input/',
+        blank=True,
+        null=True,
+        verbose_name='上传文件'
+    )
+    result_file = models.FileField(
+        upload_to='student_jobs/results/',
+        blank=True,
+        null=True,
+        verbose_name='结果文件'
+    )
+    total = models.IntegerField(default=0, verbose_name='总行数')
+    processed = models.IntegerField(default=0, verbose_name='已处理行数')
+    success_count = models.IntegerField(default=0, verbose_name='成功数')
+    failed_count = models.IntegerField(default=0, verbose_name='失败数')
+    errors = models.JSONField(default=list, blank=True, verbose_name='错误明细')
+    message = models.TextField(blank=True, verbose_name='结果信息')
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='student_jobs',
+        verbose_name='创建者'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='完成时间')
+    worker_id = models.CharField(max_length=100, blank=True, verbose_name='执行进程')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='最近心跳')
+    
+    class Meta:
+        db_table = 'students_studentjob'
+        verbose_name = '学员导入导出任务'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.get_job_type_display()}任务 #{self.pk} ({self.get_status_display()})"
+    
+    def can_access(self, user):
+        """任务及其文件只允许创建者和管理员访问"""
+        if not user.is_authenticated:
+            return False
+        if user.is_staff or user.user_type == 'admin':
+            return True
+        return self.created_by_id == user.pk
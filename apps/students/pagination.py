@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class StudentCursorPagination:
+    """
+    学员游标分页（keyset pagination）
+
+    按 (-created_at, id) 排序，通过 WHERE 条件定位下一页，
+    不使用 OFFSET，也不执行 COUNT(*)，翻页耗时与页码深度无关。
+    """
+    ordering = ('-created_at', 'id')
+    reverse_ordering = ('created_at', '-id')
+    max_page_size = 100
+
+    def __init__(self, page_size=20):
+        # 超出范围的每页条数截断到 1 到 max_page_size 之间
+        self.page_size = min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, student, direction):
+        """将当前位置编码为不透明的游标字符串"""
+        payload = {
+            'c': student.created_at.isoformat(),
+            'i': student.pk,
+            'd': direction,
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """解析游标，空游标表示第一页；格式错误时抛出 ValueError"""
+        if not cursor:
+            return None, 'next'
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            created_at = datetime.fromisoformat(payload['c'])
+            pk = int(payload['i'])
+            direction = payload.get('d', 'next')
+        except (ValueError, TypeError, KeyError):
+            raise ValueError('无效的游标')
+        if direction not in ('next', 'previous'):
+            raise ValueError('无效的游标')
+        return (created_at, pk), direction
+
+    def paginate_queryset(self, queryset, cursor):
+        """返回 (当前页记录列表, 下一页游标, 上一页游标)"""
+        position, direction = self.decode_cursor(cursor)
+
+        if direction == 'next':
+            queryset = queryset.order_by(*self.ordering)
+            if position is not None:
+                created_at, pk = position
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) |
+                    Q(created_at=created_at, id__gt=pk)
+                )
+        else:
+            created_at, pk = position
+            queryset = queryset.order_by(*self.reverse_ordering).filter(
+                Q(created_at__gt=created_at) |
+                Q(created_at=created_at, id__lt=pk)
+            )
+
+        # 多取一条用于判断是否还有更多数据
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if direction == 'previous':
+            rows.reverse()
+
+        if not rows:
+            return rows, None, None
+
+        if direction == 'next':
+            next_cursor = self.encode_cursor(rows[-1], 'next') if has_more else None
+            previous_cursor = self.encode_cursor(rows[0], 'previous') if position else None
+        else:
+            next_cursor = self.encode_cursor(rows[-1], 'next')
+            previous_cursor = self.encode_cursor(rows[0], 'previous') if has_more else None
+
+        return rows, next_cursor, previous_cursor
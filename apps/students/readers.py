@@ -0,0 +1,115 @@
+from openpyxl import load_workbook
+import pandas as pd
+
+
+# 每批读取的行数
+READ_BATCH_SIZE = 1000
+
+# 支持导入的文件扩展名
+IMPORT_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+
+
+class StudentFileReader:
+    """
+    流式读取学员导入文件
+
+    按批返回 DataFrame，索引为文件中的行号（标题为第1行），内存占用只与批大小有关：
+    .xlsx 使用 openpyxl read_only 模式逐行读取，.csv 使用 pandas 分块读取；
+    .xls 旧格式 openpyxl 不支持，仍整体读入后再分批。
+    """
+
+    def __init__(self, file, filename, batch_size=READ_BATCH_SIZE):
+        self.file = file
+        self.batch_size = batch_size
+        self.estimated_total = None
+        self._workbook = None
+
+        name = filename.lower()
+        if name.endswith('.xlsx'):
+            batches = self._iter_xlsx()
+        elif name.endswith('.csv'):
+            batches = self._iter_csv()
+        elif name.endswith('.xls'):
+            batches = self._iter_xls()
+        else:
+            raise ValueError(f'不支持的文件类型，只支持: {", ".join(IMPORT_EXTENSIONS)}')
+
+        # 预读第一批以获得列名；每种格式至少产生一个（可能为空的）批次
+        self._first = next(batches)
+        self._batches = batches
+        self.columns = list(self._first.columns)
+
+    def batches(self):
+        """逐批返回 DataFrame"""
+        try:
+            first, self._first = self._first, None
+            if first is not None and len(first):
+                yield first
+            yield from self._batches
+        finally:
+            self.close()
+
+    def records(self):
+        """逐行返回 (行号, 行数据)，供 StudentBulkImporter 使用"""
+        for batch in self.batches():
+            yield from zip(batch.index, batch.to_dict('records'))
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def _frame(self, columns, rows, row_numbers):
+        return pd.DataFrame.from_records(rows, columns=columns, index=row_numbers)
+
+    def _iter_xlsx(self):
+        self._workbook = load_workbook(self.file, read_only=True, data_only=True)
+        worksheet = self._workbook.active
+        if worksheet.max_row:
+            self.estimated_total = max(worksheet.max_row - 1, 0)
+
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, ())
+        columns = [
+            str(value).strip() if value is not None else f'Unnamed: {index}'
+            for index, value in enumerate(header)
+        ]
+        width = len(columns)
+
+        batch, row_numbers = [], []
+        for row_number, values in enumerate(rows, start=2):
+            # 跳过空行
+            if all(value is None or value == '' for value in values):
+                continue
+            values = tuple(values[:width]) + (None,) * (width - len(values))
+            batch.append(values)
+            row_numbers.append(row_number)
+            if len(batch) >= self.batch_size:
+                yield self._frame(columns, batch, row_numbers)
+                batch, row_numbers = [], []
+        yield self._frame(columns, batch, row_numbers)
+
+    def _iter_csv(self):
+        # 全部按字符串读取，保留学号、电话等列的前导零
+        chunks = pd.read_csv(
+            self.file,
+            dtype=str,
+            keep_default_na=False,
+            encoding='utf-8-sig',
+            chunksize=self.batch_size,
+        )
+        empty = True
+        for chunk in chunks:
+            empty = False
+            chunk.index = chunk.index + 2
+            yield chunk
+        if empty:
+            yield pd.DataFrame()
+
+    def _iter_xls(self):
+        df = pd.read_excel(self.file)
+        df.index = df.index + 2
+        self.estimated_total = len(df)
+        yield df.iloc[:self.batch_size]
+        for start in range(self.batch_size, len(df), self.batch_size):
+            yield df.iloc[start:start + self.batch_size]
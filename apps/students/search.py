@@ -0,0 +1,189 @@
+"""
+学员搜索文档
+
+每个学员一行去规范化的搜索文本（学号、用户名、姓名、姓名拼音全拼和首字母、院系），
+按数据库类型使用不同的全文索引：
+    MySQL   FULLTEXT 索引 + ngram 分词器（二元分词，中文和拼音子串都能命中）
+    SQLite  FTS5 虚拟表，写入前在 Python 中切分为二元词元，用于本地开发
+其他数据库退回到对搜索文本的 icontains。
+"""
+import re
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from pypinyin import lazy_pinyin
+
+
+SEARCH_TABLE = 'students_studentsearch'
+SEARCH_FTS_TABLE = 'students_studentsearch_fts'
+
+# 生成搜索文本所需的学员字段
+SEARCH_SOURCE_FIELDS = (
+    'pk', 'student_id', 'user__username', 'user__first_name', 'user__last_name', 'department'
+)
+
+# 每批重建的学员数
+SEARCH_BATCH_SIZE = 1000
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def words(text):
+    return WORD_RE.findall(text.lower())
+
+
+@lru_cache(maxsize=None)
+def char_pinyin(char):
+    """单个字的拼音，非汉字原样返回"""
+    return lazy_pinyin(char)[0].lower()
+
+
+def name_pinyin(name):
+    """
+    姓名的拼音全拼和首字母，如 张三 -> ('zhangsan', 'zs')
+
+    按字转换并缓存，整体构建提示索引时比逐个姓名调用 pypinyin 快一个数量级。
+    """
+    syllables = [char_pinyin(char) for char in name]
+    return ''.join(syllables), ''.join(syllable[:1] for syllable in syllables)
+
+
+def search_text(student_id, username, first_name, last_name, department):
+    """拼接学员的搜索文本，姓名额外生成拼音全拼（zhangsan）和首字母（zs）"""
+    name = f'{last_name}{first_name}'
+    parts = [student_id, username, name, first_name, last_name, department]
+    if name:
+        parts.extend(name_pinyin(name))
+
+    unique = []
+    for word in words(' '.join(parts)):
+        if word not in unique:
+            unique.append(word)
+    return ' '.join(unique)
+
+
+def ngram_tokens(text):
+    """
+    把搜索文本切分为二元词元，供 FTS5 使用
+
+    每个词输出全部相邻两字，再加上最后一个字，使单字查询也能以前缀方式命中。
+    """
+    tokens = []
+    for word in text.split():
+        tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        tokens.append(word[-1])
+    return ' '.join(tokens)
+
+
+def mysql_match_query(search):
+    """BOOLEAN MODE 查询：每个词都必须出现，多字词按 ngram 短语匹配，单字按前缀匹配"""
+    return ' '.join(
+        f'+"{word}"' if len(word) > 1 else f'+{word}*'
+        for word in words(search)
+    )
+
+
+def fts_match_query(search):
+    """FTS5 查询：多字词转为二元词元短语，单字按前缀匹配"""
+    terms = []
+    for word in words(search):
+        if len(word) > 1:
+            bigrams = ' '.join(word[i:i + 2] for i in range(len(word) - 1))
+            terms.append(f'"{bigrams}"')
+        else:
+            terms.append(f'"{word}"*')
+    return ' '.join(terms)
+
+
+def search_condition(search):
+    """返回按搜索文档过滤学员的 Q 对象"""
+    if words(search):
+        if connection.vendor == 'mysql':
+            return Q(pk__in=RawSQL(
+                f'SELECT student_id FROM {SEARCH_TABLE} '
+                f'WHERE MATCH(document) AGAINST (%s IN BOOLEAN MODE)',
+                [mysql_match_query(search)]
+            ))
+        if connection.vendor == 'sqlite':
+            return Q(pk__in=RawSQL(
+                f'SELECT rowid FROM {SEARCH_FTS_TABLE} WHERE {SEARCH_FTS_TABLE} MATCH %s',
+                [fts_match_query(search)]
+            ))
+    return Q(search_document__document__icontains=search.strip().lower())
+
+
+def create_search_index(schema_editor):
+    """创建全文索引（迁移中调用）"""
+    if schema_editor.connection.vendor == 'mysql':
+        # 默认停用词表会丢弃包含 a、i 等停用词的二元词元，建索引前在会话中关闭
+        schema_editor.execute('SET SESSION innodb_ft_enable_stopword = OFF')
+        schema_editor.execute(
+            f'ALTER TABLE {SEARCH_TABLE} '
+            f'ADD FULLTEXT INDEX student_search_ngram_idx (document) WITH PARSER ngram'
+        )
+    elif schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {SEARCH_FTS_TABLE} USING fts5(tokens)'
+        )
+
+
+def drop_search_index(schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            f'ALTER TABLE {SEARCH_TABLE} DROP INDEX student_search_ngram_idx'
+        )
+    elif schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_FTS_TABLE}')
+
+
+def iter_source_batches(students, batch_size=SEARCH_BATCH_SIZE):
+    """
+    按主键分批读取生成搜索文本所需的字段，每批只在内存中保留 batch_size 行
+
+    与 exports.iter_student_values 相同，按 pk 做 keyset 分批查询。
+    """
+    students = students.order_by('pk').values_list(*SEARCH_SOURCE_FIELDS)
+    last_pk = 0
+    while True:
+        rows = list(students.filter(pk__gt=last_pk)[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def write_search_documents(document_model, students):
+    """
+    重建给定学员的搜索文档
+
+    document_model 为搜索文档模型（迁移中传入历史模型），students 为学员查询集。
+    先删除旧文档再批量插入，SQLite 下同步写入 FTS5 表（rowid 即学员ID）。
+    """
+    for batch in iter_source_batches(students):
+        documents = {pk: search_text(*values) for pk, *values in batch}
+        document_model.objects.filter(student_id__in=list(documents)).delete()
+        document_model.objects.bulk_create([
+            document_model(student_id=pk, document=document)
+            for pk, document in documents.items()
+        ])
+        if connection.vendor == 'sqlite':
+            delete_fts_rows(list(documents))
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {SEARCH_FTS_TABLE} (rowid, tokens) VALUES (%s, %s)',
+                    [(pk, ngram_tokens(document)) for pk, document in documents.items()]
+                )
+
+
+def delete_fts_rows(student_ids):
+    """删除 FTS5 表中的行；搜索文档行随学员级联删除，FTS5 表需要单独处理"""
+    if connection.vendor != 'sqlite' or not student_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(student_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_FTS_TABLE} WHERE rowid IN ({placeholders})',
+            list(student_ids)
+        )
@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Student, StudentContact, StudentAchievement, StudentPhoto
+from django.db import transaction
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from .models import Student, StudentContact, StudentAchievement, StudentPhoto, StudentJob
 
 
 class StudentContactSerializer(serializers.ModelSerializer):
@@ -24,11 +27,17 @@ class StudentAchievementSerializer(serializers.ModelSerializer):
 class StudentPhotoSerializer(serializers.ModelSerializer):
     """学员相片序列化器"""
     photo_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
     
     class Meta:
         model = StudentPhoto
-        fields = ['id', 'student', 'photo', 'photo_url', 'description', 'is_primary', 'uploaded_at']
-        read_only_fields = ['id', 'uploaded_at']
+        fields = [
+            'id', 'student', 'photo', 'photo_url', 'thumbnails',
+            'description', 'is_primary', 'uploaded_at'
+        ]
+        # 相片不能通过修改接口转给其他学员，否则原学员的主相片指针仍指向它；
+        # 相片文件也不能在这里替换，新文件必须经过上传接口的 prepare_photo 规范化处理
+        read_only_fields = ['id', 'student', 'photo', 'uploaded_at']
     
     def get_photo_url(self, obj):
         """获取相片URL"""
@@ -38,6 +47,15 @@ class StudentPhotoSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.photo.url)
             return obj.photo.url
         return None
+    
+    def get_thumbnails(self, obj):
+        """获取各尺寸缩略图URL，尚未生成时返回空字典"""
+        request = self.context.get('request')
+        thumbnails = {}
+        for size, name in obj.renditions.items():
+            url = default_storage.url(name)
+            thumbnails[size] = request.build_absolute_uri(url) if request else url
+        return thumbnails
 
 
 class StudentPhotoCreateSerializer(serializers.ModelSerializer):
@@ -46,31 +64,77 @@ class StudentPhotoCreateSerializer(serializers.ModelSerializer):
         model = StudentPhoto
         fields = ['student', 'photo', 'description', 'is_primary']
     
-    def validate(self, data):
-        """验证数据"""
-        # 如果设置为primary，取消其他相片的primary状态
-        if data.get('is_primary', False):
-            StudentPhoto.objects.filter(
-                student=data['student'], 
-                is_primary=True
-            ).update(is_primary=False)
-        return data
+    def create(self, validated_data):
+        # 主相片在同一事务中通过 make_primary 切换，取消其他相片的主相片状态
+        is_primary = validated_data.pop('is_primary', False)
+        with transaction.atomic():
+            photo = super().create(validated_data)
+            if is_primary:
+                photo.make_primary()
+        return photo
 
 
 class StudentSerializer(serializers.ModelSerializer):
+    """
+    学员序列化器
+    
+    支持 fields 参数只输出部分字段，配合 resolve_student_fields 使用。
+    """
     user = serializers.StringRelatedField(read_only=True)
     contact_info = StudentContactSerializer(read_only=True)
     achievements = StudentAchievementSerializer(many=True, read_only=True)
     photos = StudentPhotoSerializer(many=True, read_only=True)
+    primary_photo = StudentPhotoSerializer(read_only=True)
+    
+    # 需要通过 expand 参数显式请求的嵌套关联
+    EXPANDABLE_FIELDS = ('achievements', 'photos')
     
     class Meta:
         model = Student
         fields = [
             'id', 'user', 'student_id', 'department', 'grade',
             'enrollment_date', 'graduation_date', 'status',
-            'created_at', 'contact_info', 'achievements', 'photos'
+            'created_at', 'contact_info', 'primary_photo', 'achievements', 'photos'
         ]
         read_only_fields = ['id', 'created_at']
+    
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def resolve_student_fields(query_params):
+    """
+    根据 fields / expand 查询参数计算需要输出的学员字段
+    
+    两个参数都未提供时返回 None（输出全部字段，保持兼容）；
+    否则嵌套关联只有出现在 expand（或 fields）中时才会输出。
+    """
+    fields_param = query_params.get('fields')
+    expand_param = query_params.get('expand')
+    if fields_param is None and expand_param is None:
+        return None
+    
+    def split(value):
+        return {item.strip() for item in (value or '').split(',') if item.strip()}
+    
+    all_fields = set(StudentSerializer.Meta.fields)
+    expandable = set(StudentSerializer.EXPANDABLE_FIELDS)
+    requested = split(fields_param) & all_fields
+    
+    if expand_param is not None:
+        expanded = split(expand_param) & expandable
+    else:
+        expanded = requested & expandable
+    
+    if fields_param is None:
+        fields = all_fields - expandable
+    else:
+        fields = (requested - expandable) | {'id'}
+    return fields | expanded
 
 
 class StudentCreateSerializer(serializers.ModelSerializer):
@@ -156,3 +220,27 @@ class StudentAchievementCreateSerializer(serializers.ModelSerializer):
             'student', 'achievement_type', 'title', 'description',
             'date_achieved', 'certificate_file'
         ]
+
+
+class StudentJobSerializer(serializers.ModelSerializer):
+    """学员导入导出任务序列化器"""
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = StudentJob
+        fields = [
+            'id', 'job_type', 'status', 'params', 'total', 'processed',
+            'success_count', 'failed_count', 'errors', 'message',
+            'download_url', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+    
+    def get_download_url(self, obj):
+        """任务完成且有结果文件时返回下载地址"""
+        if obj.status != 'completed' or not obj.result_file:
+            return None
+        url = reverse('students:student-job-download', args=[obj.pk])
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(url)
+        return url
@@ -0,0 +1,153 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.users.models import User
+from pxweb.response_cache import invalidate_tags
+from .duplicates import PHOTO_HASHES_TAG
+from .images import delete_orphaned_renditions, expected_renditions, schedule_renditions
+from .models import (
+    Student, StudentAchievement, StudentContact, StudentPhoto, StudentSearchDocument
+)
+from .search import delete_fts_rows
+from .stats import STATS_FIELDS, stats_key, update_counters
+from .suggest import refresh_suggestions, suggest_index
+
+
+# 修改后需要重建搜索文档的字段
+STUDENT_SEARCH_FIELDS = {'student_id', 'department'}
+USER_SEARCH_FIELDS = {'username', 'first_name', 'last_name'}
+# 学员详情中显示的用户字段（用户名和用户类型）
+USER_DISPLAY_FIELDS = {'username', 'user_type'}
+
+
+# 需要在删除或替换时释放存储引用的文件字段
+FILE_FIELDS = {
+    StudentPhoto: ('photo', 'original'),
+    StudentAchievement: ('certificate_file',),
+}
+
+
+def release_file(field_file):
+    """释放一个文件引用，最后一个引用释放后存储会删除文件"""
+    if field_file and field_file.name:
+        field_file.storage.delete(field_file.name)
+
+
+@receiver(pre_save, sender=StudentPhoto)
+@receiver(pre_save, sender=StudentAchievement)
+def remember_old_file(sender, instance, **kwargs):
+    """记录修改前的文件路径，用于在替换文件后释放旧文件"""
+    if instance.pk:
+        old_names = sender.objects.filter(pk=instance.pk).values_list(
+            *FILE_FIELDS[sender]
+        ).first()
+        if old_names:
+            instance._old_file_names = dict(zip(FILE_FIELDS[sender], old_names))
+
+
+@receiver(post_save, sender=StudentPhoto)
+@receiver(post_save, sender=StudentAchievement)
+def release_replaced_file(sender, instance, created, **kwargs):
+    old_names = getattr(instance, '_old_file_names', {})
+    for field_name in FILE_FIELDS[sender]:
+        field_file = getattr(instance, field_name)
+        old_name = old_names.get(field_name)
+        if old_name and old_name != field_file.name:
+            field_file.storage.delete(old_name)
+    instance._old_file_names = {
+        field_name: getattr(instance, field_name).name
+        for field_name in FILE_FIELDS[sender]
+    }
+
+
+@receiver(post_delete, sender=StudentPhoto)
+def photo_deleted(sender, instance, **kwargs):
+    invalidate_tags(PHOTO_HASHES_TAG)
+    photo_name = instance.photo.name
+    release_file(instance.photo)
+    release_file(instance.original)
+    if instance.renditions:
+        renditions = list(instance.renditions.values())
+        transaction.on_commit(lambda: delete_orphaned_renditions(photo_name, renditions))
+
+
+@receiver(post_delete, sender=StudentAchievement)
+def achievement_deleted(sender, instance, **kwargs):
+    release_file(instance.certificate_file)
+
+
+@receiver(post_save, sender=StudentPhoto)
+def photo_saved(sender, instance, created, **kwargs):
+    """新上传或更换相片文件后生成缩略图；新相片使查重结果缓存失效"""
+    if created:
+        invalidate_tags(PHOTO_HASHES_TAG)
+    if instance.photo and instance.renditions != expected_renditions(instance.photo.name):
+        schedule_renditions([instance.pk])
+
+
+def fields_changed(update_fields, fields):
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+@receiver(pre_save, sender=Student)
+def remember_old_stats_key(sender, instance, update_fields=None, **kwargs):
+    """记录修改前的状态、院系和年级，用于更新统计计数"""
+    if instance.pk and fields_changed(update_fields, set(STATS_FIELDS)):
+        instance._old_stats_key = sender.objects.filter(pk=instance.pk).values_list(
+            *STATS_FIELDS
+        ).first()
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, update_fields=None, **kwargs):
+    """更新版本号、统计计数和响应缓存；学号或院系变化后重建搜索文档和输入提示"""
+    if not created:
+        Student.objects.filter(pk=instance.pk).touch()
+    invalidate_tags(f'student:{instance.pk}')
+    new_key = stats_key(instance)
+    old_key = None if created else getattr(instance, '_old_stats_key', None)
+    instance._old_stats_key = new_key
+    if created:
+        update_counters({new_key: 1})
+    elif old_key and old_key != new_key:
+        update_counters({old_key: -1, new_key: 1})
+
+    if fields_changed(update_fields, STUDENT_SEARCH_FIELDS):
+        StudentSearchDocument.objects.refresh(Student.objects.filter(pk=instance.pk))
+        refresh_suggestions([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """用户名或姓名变化后重建对应学员的搜索文档、输入提示和响应缓存；新建用户时学员尚不存在"""
+    if created:
+        return
+    students = Student.objects.filter(user=instance)
+    if fields_changed(update_fields, USER_SEARCH_FIELDS):
+        StudentSearchDocument.objects.refresh(students)
+        refresh_suggestions(students.values_list('pk', flat=True))
+    if fields_changed(update_fields, USER_DISPLAY_FIELDS):
+        students.touch()
+        invalidate_tags(*(f'student:{pk}' for pk in students.values_list('pk', flat=True)))
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    invalidate_tags(f'student:{instance.pk}')
+    update_counters({stats_key(instance): -1})
+    delete_fts_rows([instance.pk])
+    student_id = instance.pk
+    transaction.on_commit(lambda: suggest_index.remove([student_id]))
+
+
+@receiver(post_save, sender=StudentContact)
+@receiver(post_save, sender=StudentAchievement)
+@receiver(post_save, sender=StudentPhoto)
+@receiver(post_delete, sender=StudentContact)
+@receiver(post_delete, sender=StudentAchievement)
+@receiver(post_delete, sender=StudentPhoto)
+def student_child_changed(sender, instance, **kwargs):
+    """联系信息、成就、相片变化后更新所属学员的版本号，并使其响应缓存失效"""
+    Student.objects.filter(pk=instance.student_id).touch()
+    invalidate_tags(f'student:{instance.student_id}')
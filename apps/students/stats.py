@@ -0,0 +1,119 @@
+"""
+学员统计
+
+人数按 (状态, 院系, 年级) 分桶保存在 StudentStatsCounter 中：单个学员的保存、删除由信号更新，
+批量导入在写入后按桶汇总一次更新，统计接口只读取计数表并缓存结果。
+统计结果缓存在各进程共享的接口响应缓存（RESPONSE_CACHE_ALIAS）中，任何进程修改计数后
+在事务提交时删除缓存，其他进程的下一次请求即读到新结果。
+计数与学员表不一致时可用 rebuild_student_stats 命令重新计算。
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from pxweb.response_cache import get_cache
+from .models import Student, StudentStatsCounter
+
+
+STATS_CACHE_KEY = 'students:stats'
+# 统计结果的缓存时间（秒），计数变化时缓存立即失效，这里只是兜底
+STATS_CACHE_TIMEOUT = getattr(settings, 'STUDENT_STATS_CACHE_TIMEOUT', 30)
+
+# 计数分桶依据的学员字段
+STATS_FIELDS = ('status', 'department', 'grade')
+
+
+def stats_key(student):
+    return tuple(getattr(student, field) for field in STATS_FIELDS)
+
+
+def count_students(students):
+    """从学员表按桶统计人数，用于重建计数表"""
+    return {
+        tuple(row[field] for field in STATS_FIELDS): row['count']
+        for row in students.order_by().values(*STATS_FIELDS).annotate(count=Count('pk'))
+    }
+
+
+def update_counters(deltas):
+    """
+    把 {桶: 增量} 累加到计数表
+
+    先用 UPDATE ... SET count = count + n 原子累加，桶不存在时插入；
+    并发插入同一个桶导致唯一约束冲突时改为累加。桶按固定顺序加锁，
+    避免并发事务以不同顺序更新同一组桶时死锁。事务提交后清除统计缓存。
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    for key, delta in sorted(deltas.items()):
+        bucket = dict(zip(STATS_FIELDS, key))
+        counters = StudentStatsCounter.objects.filter(**bucket)
+        if counters.update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                StudentStatsCounter.objects.create(count=delta, **bucket)
+        except IntegrityError:
+            counters.update(count=F('count') + delta)
+    transaction.on_commit(lambda: get_cache().delete(STATS_CACHE_KEY))
+
+
+def rebuild_counters():
+    """按学员表重新计算全部计数"""
+    with transaction.atomic():
+        StudentStatsCounter.objects.all().delete()
+        StudentStatsCounter.objects.bulk_create([
+            StudentStatsCounter(count=count, **dict(zip(STATS_FIELDS, key)))
+            for key, count in count_students(Student.objects.all()).items()
+        ])
+    transaction.on_commit(lambda: get_cache().delete(STATS_CACHE_KEY))
+
+
+def compute_stats():
+    """
+    从计数表计算统计结果
+
+    总数和各状态人数用一次条件聚合得到，分组明细为计数表中人数大于 0 的桶。
+    """
+    counters = StudentStatsCounter.objects.filter(count__gt=0)
+    totals = counters.aggregate(
+        total=Sum('count'),
+        **{
+            status: Sum('count', filter=Q(status=status))
+            for status, _ in Student.STATUS_CHOICES
+        }
+    )
+    by_status = {
+        status: totals[status] or 0 for status, _ in Student.STATUS_CHOICES
+    }
+    breakdown = list(
+        counters.order_by(*STATS_FIELDS).values(*STATS_FIELDS, 'count')
+    )
+    return {
+        'total_students': totals['total'] or 0,
+        'active_students': by_status['active'],
+        'graduated_students': by_status['graduated'],
+        'by_status': by_status,
+        'breakdown': breakdown,
+    }
+
+
+def student_stats():
+    return get_cache().get_or_set(STATS_CACHE_KEY, compute_stats, STATS_CACHE_TIMEOUT)
+
+
+def import_deltas(created, changed):
+    """
+    批量导入的计数增量
+
+    created 为新增学员的桶列表，changed 为 [(修改前的桶, 修改后的桶)]。
+    """
+    deltas = Counter(created)
+    for old, new in changed:
+        if old != new:
+            deltas[old] -= 1
+            deltas[new] += 1
+    return deltas
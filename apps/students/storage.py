@@ -0,0 +1,162 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+from pxweb.storage import SignedURLMixin
+
+
+# 按内容寻址的文件路径，见 ContentAddressedStorage.blob_name
+BLOB_NAME_RE = re.compile(r'^[^/]+/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}(\.[^/]*)?$')
+
+
+@deconstructible
+class ContentAddressedStorage(SignedURLMixin, FileSystemStorage):
+    """
+    按内容寻址、去重的文件存储
+
+    上传时边写临时文件边计算 SHA-256，相同内容只保存一份，路径形如
+    student_photos/ab/cd/<sha256>.jpg；StoredBlob 记录每份文件的引用次数，
+    delete() 只减少引用，最后一个引用删除后才真正删除文件。
+    未登记在 StoredBlob 中的旧文件按普通文件处理。url() 返回带签名的地址，见 pxweb.storage。
+
+    新文件在 StoredBlob 行写入的同时移动到位，外层事务回滚后文件会残留；
+    这类文件和中断上传留下的临时文件由 sweep_stored_blobs 命令定期清理。
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # 最终路径由内容摘要决定，见 _save
+        return name
+
+    def blob_name(self, name, digest):
+        top = name.replace('\\', '/').split('/', 1)[0] if '/' in name else 'blobs'
+        ext = os.path.splitext(name)[1].lower()
+        return f'{top}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+    def _save(self, name, content):
+        StoredBlob = apps.get_model('students', 'StoredBlob')
+
+        # 临时文件与目标目录位于同一文件系统，保证 os.replace 是原子操作
+        incoming = os.path.join(self.location, '.incoming')
+        os.makedirs(incoming, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=incoming)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    hasher.update(chunk)
+                    size += len(chunk)
+                    temp_file.write(chunk)
+
+            digest = hasher.hexdigest()
+            with transaction.atomic():
+                blob, created = StoredBlob.objects.select_for_update().get_or_create(
+                    digest=digest,
+                    defaults={'name': self.blob_name(name, digest), 'size': size}
+                )
+                if not created:
+                    StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+                full_path = self.path(blob.name)
+                if created or not os.path.exists(full_path):
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.replace(temp_path, full_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(full_path, self.file_permissions_mode)
+            return blob.name
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def delete(self, name):
+        if not name:
+            raise ValueError('The name must be given to delete().')
+        StoredBlob = apps.get_model('students', 'StoredBlob')
+
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                # 旧文件，没有引用计数
+                super().delete(name)
+                return
+            if blob.ref_count > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            blob.delete()
+
+        # 提交后再删除文件；期间若重新上传了相同内容则保留
+        transaction.on_commit(lambda: self.remove_unreferenced(name))
+
+    def remove_unreferenced(self, name):
+        """
+        锁定该内容摘要的 StoredBlob 行后删除文件，文件仍被引用时保留，返回是否已删除
+
+        _save 登记同一内容时锁定（或插入）同一摘要的行，行不存在时这里插入一条引用次数为 0 的
+        占位行加锁，检查引用和删除文件之间不会有并发上传把同一文件重新写入并登记。
+        """
+        StoredBlob = apps.get_model('students', 'StoredBlob')
+        digest = os.path.splitext(os.path.basename(name))[0]
+        with transaction.atomic():
+            blob, _ = StoredBlob.objects.select_for_update().get_or_create(
+                digest=digest, defaults={'name': name, 'ref_count': 0}
+            )
+            if blob.name == name and blob.ref_count:
+                return False
+            super().delete(name)
+            if not blob.ref_count:
+                blob.delete()
+        return True
+
+    def orphaned_files(self, min_age):
+        """
+        返回没有 StoredBlob 记录的文件和残留的临时文件（相对路径），只包含修改时间早于
+        min_age 秒之前的文件，避免误删尚未提交的事务刚写入的文件
+        """
+        StoredBlob = apps.get_model('students', 'StoredBlob')
+        if not os.path.isdir(self.location):
+            return []
+        cutoff = time.time() - min_age
+        temp_files = []
+        blobs = []
+        for root, dirs, files in os.walk(self.location):
+            for filename in files:
+                full_path = os.path.join(root, filename)
+                name = os.path.relpath(full_path, self.location).replace(os.sep, '/')
+                if name.startswith('.incoming/'):
+                    bucket = temp_files
+                elif BLOB_NAME_RE.match(name):
+                    bucket = blobs
+                else:
+                    continue
+                try:
+                    if os.path.getmtime(full_path) < cutoff:
+                        bucket.append(name)
+                except FileNotFoundError:
+                    pass
+
+        orphans = temp_files
+        for start in range(0, len(blobs), 1000):
+            batch = blobs[start:start + 1000]
+            known = set(StoredBlob.objects.filter(name__in=batch).values_list('name', flat=True))
+            orphans.extend(name for name in batch if name not in known)
+        return orphans
+
+    def remove_orphan(self, name):
+        """删除 orphaned_files 返回的文件；存储文件在加锁后再确认一次没有被重新登记"""
+        if BLOB_NAME_RE.match(name):
+            self.remove_unreferenced(name)
+        else:
+            super().delete(name)
+
+
+content_addressed_storage = ContentAddressedStorage()
@@ -0,0 +1,229 @@
+"""
+学员选择器的输入提示
+
+每个进程在内存中维护一份按前缀查找的索引：键为学号、姓名、姓名拼音全拼和首字母，
+保存在排序后的字符串列表中，学员ID保存在与之对齐的整数数组中，查询时二分定位前缀。
+首次请求时在后台线程中构建，构建完成前按学号、姓名前缀查询数据库（不支持拼音），
+请求不会等待整体构建；本进程内的保存、删除通过信号增量更新，大批量变化时合并重建
+键数组而不是逐个插入；其他进程的修改在索引超过 SUGGEST_MAX_AGE 秒后由后台线程整体重建时同步。
+"""
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Concat
+
+from .images import RENDITION_SIZES, in_thread
+from .models import Student
+from .search import name_pinyin
+
+
+# 默认和最多返回的提示条数
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+# 索引整体重建的间隔（秒），用于同步其他进程中的修改
+SUGGEST_MAX_AGE = getattr(settings, 'STUDENT_SUGGEST_MAX_AGE', 300)
+# 一次变化的学员数超过该值时合并重建键数组，否则逐个插入
+SUGGEST_MERGE_THRESHOLD = 100
+# 提示中使用的缩略图尺寸
+SUGGEST_THUMBNAIL_SIZE = str(min(RENDITION_SIZES))
+
+SUGGEST_SOURCE_FIELDS = ('pk', 'student_id', 'user__first_name', 'user__last_name', 'user__username')
+
+
+def normalize(text):
+    return ''.join(text.lower().split())
+
+
+def suggest_entry(student_id, first_name, last_name, username):
+    """返回 (显示文本, 索引键)"""
+    name = f'{last_name}{first_name}'
+    label = f'{name or username}（{student_id}）'
+    keys = {normalize(student_id)}
+    if name:
+        keys.add(normalize(name))
+        keys.update(normalize(value) for value in name_pinyin(name))
+    keys.discard('')
+    return label, tuple(sorted(keys))
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []
+        self._ids = array('q')
+        # 学员ID -> (显示文本, 索引键)
+        self._entries = {}
+        self._built_at = None
+        self._rebuilding = False
+        # 后台重建期间发生变化的学员，重建完成后重新应用
+        self._changed = set()
+
+    @property
+    def ready(self):
+        return self._built_at is not None
+
+    @property
+    def tracking(self):
+        """索引已构建或正在构建，需要记录学员的变化"""
+        return self.ready or self._rebuilding
+
+    def load(self, students):
+        return {
+            pk: suggest_entry(*values)
+            for pk, *values in students.values_list(*SUGGEST_SOURCE_FIELDS).iterator()
+        }
+
+    def build(self):
+        """从数据库整体构建索引，构建期间旧索引仍可查询"""
+        entries = self.load(Student.objects.all())
+        pairs = sorted((key, pk) for pk, (_, keys) in entries.items() for key in keys)
+        keys = [key for key, _ in pairs]
+        ids = array('q', (pk for _, pk in pairs))
+
+        with self._lock:
+            self._keys, self._ids, self._entries = keys, ids, entries
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+            changed, self._changed = self._changed, set()
+        if changed:
+            self.refresh(changed)
+
+    def _rebuild_in_background(self):
+        try:
+            in_thread(self.build)
+        finally:
+            self._rebuilding = False
+
+    def ensure_ready(self):
+        """
+        索引尚未构建或已过期时在后台线程中构建，返回索引当前是否可用
+
+        构建期间继续使用旧索引；首次构建完成前由调用方退回到数据库查询。
+        """
+        expired = self.ready and time.monotonic() - self._built_at > SUGGEST_MAX_AGE
+        if (not self.ready or expired) and not self._rebuilding:
+            with self._lock:
+                if not self._rebuilding:
+                    self._rebuilding = True
+                    threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+        return self.ready
+
+    def _remove(self, pk):
+        _, keys = self._entries.pop(pk, (None, ()))
+        for key in keys:
+            index = bisect_left(self._keys, key)
+            while index < len(self._keys) and self._keys[index] == key:
+                if self._ids[index] == pk:
+                    del self._keys[index]
+                    del self._ids[index]
+                    break
+                index += 1
+
+    def _add(self, pk, entry):
+        self._entries[pk] = entry
+        for key in entry[1]:
+            index = bisect_left(self._keys, key)
+            self._keys.insert(index, key)
+            self._ids.insert(index, pk)
+
+    def _merge(self, student_ids, entries):
+        """一次替换一批学员：过滤掉旧键后与新键归并，整体为线性时间"""
+        pairs = sorted(
+            (key, pk) for pk in student_ids if pk in entries for key in entries[pk][1]
+        )
+        kept = ((key, pk) for key, pk in zip(self._keys, self._ids) if pk not in student_ids)
+        merged = list(heapq.merge(kept, pairs))
+        self._keys = [key for key, _ in merged]
+        self._ids = array('q', (pk for _, pk in merged))
+        for pk in student_ids:
+            self._entries.pop(pk, None)
+            if pk in entries:
+                self._entries[pk] = entries[pk]
+
+    def _apply(self, student_ids, entries):
+        """用 entries（学员ID -> 条目）替换给定学员，entries 中没有的学员从索引中移除"""
+        if self._rebuilding:
+            self._changed.update(student_ids)
+        if not self.ready:
+            return
+        if len(student_ids) > SUGGEST_MERGE_THRESHOLD:
+            self._merge(student_ids, entries)
+            return
+        for pk in student_ids:
+            self._remove(pk)
+            if pk in entries:
+                self._add(pk, entries[pk])
+
+    def refresh(self, student_ids):
+        """按数据库中的当前值更新给定学员，已删除的学员从索引中移除"""
+        student_ids = set(student_ids)
+        if not self.tracking or not student_ids:
+            return
+        entries = self.load(Student.objects.filter(pk__in=student_ids)) if self.ready else {}
+        with self._lock:
+            self._apply(student_ids, entries)
+
+    def remove(self, student_ids):
+        student_ids = set(student_ids)
+        if not self.tracking or not student_ids:
+            return
+        with self._lock:
+            self._apply(student_ids, {})
+
+    def search(self, query, limit=SUGGEST_LIMIT):
+        """返回键以 query 开头的学员 [(学员ID, 显示文本)]，按键排序"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        with self._lock:
+            index = bisect_left(self._keys, prefix)
+            while index < len(self._keys) and len(results) < limit:
+                if not self._keys[index].startswith(prefix):
+                    break
+                pk = self._ids[index]
+                if pk not in seen:
+                    seen.add(pk)
+                    results.append((pk, self._entries[pk][0]))
+                index += 1
+        return results
+
+
+suggest_index = SuggestIndex()
+
+
+def search_database(query, limit=SUGGEST_LIMIT):
+    """索引构建完成前的数据库查询：学号或姓名以 query 开头，不支持拼音"""
+    prefix = normalize(query)
+    if not prefix:
+        return []
+    students = Student.objects.annotate(
+        full_name=Concat('user__last_name', 'user__first_name')
+    ).filter(
+        Q(student_id__istartswith=prefix) | Q(full_name__istartswith=prefix)
+    ).order_by('student_id')
+    return [
+        (pk, suggest_entry(*values)[0])
+        for pk, *values in students.values_list(*SUGGEST_SOURCE_FIELDS)[:limit]
+    ]
+
+
+def suggest_students(query, limit=SUGGEST_LIMIT):
+    """返回 [(学员ID, 显示文本)]，索引可用时查询索引，否则查询数据库"""
+    if suggest_index.ensure_ready():
+        return suggest_index.search(query, limit)
+    return search_database(query, limit)
+
+
+def refresh_suggestions(student_ids):
+    """事务提交后更新本进程的输入提示索引；索引尚未开始构建时无需处理"""
+    if suggest_index.tracking:
+        student_ids = list(student_ids)
+        transaction.on_commit(lambda: suggest_index.refresh(student_ids))
@@ -0,0 +1,1267 @@
+import csv
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from datetime import date
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook, load_workbook
+import pandas as pd
+from PIL import Image
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+from pxweb import media
+from pxweb.response_cache import get_cache, invalidate_tags, tag_versions
+from pxweb.storage import MEDIA_URL_MAX_AGE, sign_media_name
+from . import images
+from .archives import import_photo_archive
+from .exports import EXPORT_COLUMNS, iter_student_values
+from .images import photo_hash_from_storage, prepare_photo
+from .importers import StudentBulkImporter, validate_batches
+from .models import (
+    Student, StudentContact, StudentAchievement, StudentPhoto, StudentJob, StudentStatsCounter,
+    StoredBlob
+)
+from .pagination import StudentCursorPagination
+from .readers import StudentFileReader
+from .serializers import StudentSerializer
+from .stats import STATS_FIELDS, count_students
+from .storage import content_addressed_storage
+
+
+# 测试中使用进程内缓存，不读写开发环境的文件缓存
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test-responses',
+    },
+}
+
+
+def use_temp_media_root(test):
+    """测试期间把 MEDIA_ROOT 指向临时目录，结束后删除"""
+    media_root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+    override = override_settings(MEDIA_ROOT=media_root)
+    override.enable()
+    test.addCleanup(override.disable)
+    return media_root
+
+
+class StudentListQueryCountTest(TestCase):
+    """学员列表查询次数不随分页大小增长"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        for i in range(10):
+            user = User.objects.create_user(
+                username=f'student_{i}', first_name=f'学员{i}'
+            )
+            student = Student.objects.create(
+                user=user,
+                student_id=f'S{i:04d}',
+                enrollment_date=date(2024, 9, 1),
+            )
+            StudentContact.objects.create(student=student)
+            for j in range(2):
+                StudentAchievement.objects.create(
+                    student=student,
+                    achievement_type='academic',
+                    title=f'成就{j}',
+                    date_achieved=date(2025, 1, 1),
+                )
+                StudentPhoto.objects.create(
+                    student=student,
+                    photo=f'student_photos/test_{i}_{j}.png',
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _count_queries(self, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/students/', {'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), page_size)
+        return len(ctx.captured_queries)
+
+    def test_query_count_constant(self):
+        self.assertEqual(self._count_queries(2), self._count_queries(10))
+
+    def test_cursor_query_count_constant(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/students/', {'cursor': '', 'page_size': 2})
+        with CaptureQueriesContext(connection) as large:
+            self.client.get('/api/students/', {'cursor': '', 'page_size': 10})
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class StudentCursorPaginationTest(TestCase):
+    """学员列表的游标分页"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        for i in range(7):
+            user = User.objects.create_user(username=f'student_{i}')
+            Student.objects.create(
+                user=user, student_id=f'S{i:04d}', enrollment_date=date(2024, 9, 1)
+            )
+        cls.expected = list(
+            Student.objects.order_by('-created_at', 'id').values_list('pk', flat=True)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _page(self, cursor='', page_size=3):
+        response = self.client.get('/api/students/', {'cursor': cursor, 'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['data']], response.data['pagination']
+
+    def test_forward_and_backward_round_trip(self):
+        pages = []
+        cursor = ''
+        while True:
+            ids, pagination = self._page(cursor)
+            pages.append((ids, pagination))
+            cursor = pagination['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual([pk for ids, _ in pages for pk in ids], self.expected)
+        self.assertEqual([len(ids) for ids, _ in pages], [3, 3, 1])
+        self.assertIsNone(pages[0][1]['previous_cursor'])
+
+        # 从最后一页往回翻，得到相同的各页
+        ids, pagination = self._page(pages[-1][1]['previous_cursor'])
+        self.assertEqual(ids, pages[1][0])
+        ids, pagination = self._page(pagination['previous_cursor'])
+        self.assertEqual(ids, pages[0][0])
+        self.assertIsNone(pagination['previous_cursor'])
+
+    def test_exact_page_boundary(self):
+        ids, pagination = self._page(page_size=7)
+        self.assertEqual(ids, self.expected)
+        self.assertIsNone(pagination['next_cursor'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-a-cursor', 'eyJjIjoxfQ'):
+            response = self.client.get('/api/students/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data, {'error': '无效的游标'})
+
+    def test_page_size_is_clamped(self):
+        ids, pagination = self._page(page_size=-5)
+        self.assertEqual(len(ids), 1)
+        self.assertEqual(pagination['page_size'], 1)
+        ids, pagination = self._page(page_size=1000000)
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(pagination['page_size'], StudentCursorPagination.max_page_size)
+
+
+class PhotoHashBackfillTest(TestCase):
+    """为旧相片补算的哈希与上传时计算的哈希一致"""
+
+    def setUp(self):
+        use_temp_media_root(self)
+
+    def _image(self, mode):
+        """左右明暗不同的图片，旋转、透明区域处理不一致时哈希会明显不同"""
+        image = Image.new(mode, (120, 80), 'white')
+        for x in range(60):
+            for y in range(80):
+                image.putpixel((x, y), (30, 60, 90, 0) if mode == 'RGBA' else (30, 60, 90))
+        return image
+
+    def _assert_backfill_matches(self, name, content):
+        ingest = prepare_photo(SimpleUploadedFile(name, content))['phash']
+        storage = StudentPhoto._meta.get_field('photo').storage
+        stored = storage.save(f'student_photos/{name}', ContentFile(content))
+        self.assertEqual(photo_hash_from_storage(stored), ingest)
+
+    def test_exif_rotated_jpeg(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        output = BytesIO()
+        self._image('RGB').save(output, 'JPEG', quality=95, exif=exif)
+        self._assert_backfill_matches('rotated.jpg', output.getvalue())
+
+    def test_transparent_png(self):
+        output = BytesIO()
+        self._image('RGBA').save(output, 'PNG')
+        self._assert_backfill_matches('transparent.png', output.getvalue())
+
+
+class ContentAddressedStorageTest(TestCase):
+    """按内容去重存储的引用计数和残留文件清理"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='student_blob')
+        cls.student = Student.objects.create(
+            user=user, student_id='S9000', enrollment_date=date(2024, 9, 1)
+        )
+
+    def setUp(self):
+        use_temp_media_root(self)
+        self.storage = content_addressed_storage
+
+    def test_same_content_shares_one_file(self):
+        first = self.storage.save('student_photos/a.jpg', ContentFile(b'same'))
+        second = self.storage.save('student_photos/b.jpg', ContentFile(b'same'))
+        self.assertEqual(first, second)
+        self.assertEqual(StoredBlob.objects.get(name=first).ref_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(first)
+        self.assertEqual(StoredBlob.objects.get(name=first).ref_count, 1)
+        self.assertTrue(self.storage.exists(first))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(first)
+        self.assertFalse(StoredBlob.objects.filter(name=first).exists())
+        self.assertFalse(self.storage.exists(first))
+
+    def test_reupload_before_removal_keeps_file(self):
+        name = self.storage.save('student_photos/a.jpg', ContentFile(b'again'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.storage.delete(name)
+        # 删除提交之后、文件删除之前又上传了相同内容
+        self.assertEqual(self.storage.save('student_photos/b.jpg', ContentFile(b'again')), name)
+        for callback in callbacks:
+            callback()
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredBlob.objects.get(name=name).ref_count, 1)
+
+        self.assertFalse(self.storage.remove_unreferenced(name))
+        StoredBlob.objects.filter(name=name).delete()
+        self.assertTrue(self.storage.remove_unreferenced(name))
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredBlob.objects.filter(name=name).exists())
+
+    def test_deleting_one_photo_keeps_shared_file(self):
+        photos = [
+            StudentPhoto.objects.create(
+                student=self.student, photo=ContentFile(b'shared', name='photo.jpg')
+            )
+            for _ in range(2)
+        ]
+        name = photos[0].photo.name
+        self.assertEqual(photos[1].photo.name, name)
+
+        self.assertEqual(StoredBlob.objects.get(name=name).ref_count, 2)
+
+        # 删除相片记录时由 post_delete 信号释放文件引用
+        with self.captureOnCommitCallbacks(execute=True):
+            photos[0].delete()
+        self.assertEqual(StoredBlob.objects.get(name=name).ref_count, 1)
+        self.assertTrue(self.storage.exists(name))
+        with self.storage.open(photos[1].photo.name) as f:
+            self.assertEqual(f.read(), b'shared')
+
+    def test_sweep_removes_file_left_by_rollback(self):
+        try:
+            with transaction.atomic():
+                name = self.storage.save('student_photos/c.jpg', ContentFile(b'rolled back'))
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        kept = self.storage.save('student_photos/d.jpg', ContentFile(b'kept'))
+        self.assertTrue(self.storage.exists(name))
+
+        self.assertEqual(self.storage.orphaned_files(min_age=3600), [])
+        old = 0
+        for path in (name, kept):
+            os.utime(self.storage.path(path), (old, old))
+        self.assertEqual(self.storage.orphaned_files(min_age=3600), [name])
+        self.storage.remove_orphan(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertTrue(self.storage.exists(kept))
+
+
+class StudentFieldsExpandTest(TestCase):
+    """fields / expand 参数控制学员接口输出的字段"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        user = User.objects.create_user(username='student_0')
+        student = Student.objects.create(
+            user=user, student_id='S0001', enrollment_date=date(2024, 9, 1)
+        )
+        StudentAchievement.objects.create(
+            student=student,
+            achievement_type='academic',
+            title='成就',
+            date_achieved=date(2025, 1, 1),
+        )
+        StudentPhoto.objects.create(student=student, photo='student_photos/test.png')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _keys(self, **params):
+        response = self.client.get('/api/students/', params)
+        self.assertEqual(response.status_code, 200)
+        return set(response.data['data'][0])
+
+    def test_without_params_returns_all_fields(self):
+        self.assertEqual(self._keys(), set(StudentSerializer.Meta.fields))
+
+    def test_fields_selects_subset(self):
+        self.assertEqual(self._keys(fields='student_id,status'), {'id', 'student_id', 'status'})
+        self.assertEqual(
+            self._keys(fields='student_id,achievements'), {'id', 'student_id', 'achievements'}
+        )
+
+    def test_expand_adds_nested_relations(self):
+        base = set(StudentSerializer.Meta.fields) - set(StudentSerializer.EXPANDABLE_FIELDS)
+        self.assertEqual(self._keys(expand=''), base)
+        self.assertEqual(self._keys(expand='photos'), base | {'photos'})
+
+    def test_unrequested_relations_are_not_loaded(self):
+        with CaptureQueriesContext(connection) as sparse:
+            self.client.get('/api/students/', {'fields': 'student_id'})
+        with CaptureQueriesContext(connection) as expanded:
+            self.client.get('/api/students/', {'expand': 'achievements,photos'})
+        self.assertLess(len(sparse.captured_queries), len(expanded.captured_queries))
+
+
+class StudentXlsxExportTest(TestCase):
+    """Excel 导出以流式响应返回，并按主键分批读取数据"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        for i in range(5):
+            user = User.objects.create_user(username=f'student_{i}', first_name=f'学员{i}')
+            Student.objects.create(
+                user=user, student_id=f'S{i:04d}', enrollment_date=date(2024, 9, 1)
+            )
+
+    def test_export_streams_workbook(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/students/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('.xlsx', response['Content-Disposition'])
+
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), [header for header, _ in EXPORT_COLUMNS])
+        self.assertEqual([row[0] for row in rows[1:]], [f'S{i:04d}' for i in range(5)])
+        self.assertEqual(rows[1][1], '学员0')
+        self.assertEqual(rows[1][8], '2024-09-01')
+
+    def test_values_are_read_in_batches(self):
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(iter_student_values(Student.objects.all(), chunk_size=2))
+        self.assertEqual([row[0] for row in rows], [f'S{i:04d}' for i in range(5)])
+        # 3 批数据加 1 次返回空结果的查询
+        self.assertEqual(len(ctx.captured_queries), 4)
+
+
+class StudentExportFormatTest(TestCase):
+    """CSV / NDJSON 导出与学员列表使用相同的过滤条件"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        for i, department in enumerate(['计算机学院', '计算机学院', '外语学院']):
+            user = User.objects.create_user(username=f'student_{i}', first_name=f'学员{i}')
+            Student.objects.create(
+                user=user,
+                student_id=f'S{i:04d}',
+                department=department,
+                enrollment_date=date(2024, 9, 1),
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _export(self, **params):
+        response = self.client.get('/api/students/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_applies_filters(self):
+        content = self._export(format='csv', department='计算机')
+        self.assertTrue(content.startswith('\ufeff学号,'))
+        rows = list(csv.reader(content.lstrip('\ufeff').splitlines()))
+        self.assertEqual([row[0] for row in rows[1:]], ['S0000', 'S0001'])
+
+    def test_ndjson_records(self):
+        content = self._export(format='ndjson', department='外语')
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['student_id'], 'S0002')
+        self.assertEqual(records[0]['first_name'], '学员2')
+        self.assertEqual(records[0]['enrollment_date'], '2024-09-01')
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get('/api/students/export/', {'format': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+
+
+def csv_upload(rows, name='students.csv'):
+    """将行列表写成导入用的 CSV 上传文件"""
+    output = StringIO()
+    csv.writer(output).writerows(rows)
+    return SimpleUploadedFile(name, output.getvalue().encode('utf-8'), content_type='text/csv')
+
+
+class StudentBulkImportTest(TestCase):
+    """批量导入按块写入，并逐行报告错误"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        user = User.objects.create_user(username='student_S0001')
+        Student.objects.create(
+            user=user, student_id='S0001', enrollment_date=date(2024, 9, 1)
+        )
+
+    def test_import_creates_students_and_reports_errors(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        upload = csv_upload([
+            ['学号', '姓名', '入学日期', '状态'],
+            ['S0001', '重复', '2024-09-01', ''],
+            ['S0002', '张三', '2024-09-01', '在读'],
+            ['S0003', '李四', '2024-09-01', '已毕业'],
+            ['S0004', '', '2024-09-01', ''],
+        ])
+        response = client.post('/api/students/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual((results['total'], results['success'], results['failed']), (4, 2, 2))
+        self.assertEqual(
+            [(error['row'], error['error']) for error in results['errors']],
+            [(2, '学号 S0001 已存在'), (5, '姓名不能为空')]
+        )
+
+        student = Student.objects.select_related('user').get(student_id='S0003')
+        self.assertEqual(student.status, 'graduated')
+        self.assertEqual(student.user.first_name, '李四')
+        self.assertTrue(User.objects.filter(username='student_S0002').exists())
+
+    def test_username_conflict_gets_suffix(self):
+        results = StudentBulkImporter().run([
+            (2, {'学号': 'S0005', '姓名': '王五', '用户名': 'student_S0001', '入学日期': '2024-09-01'}),
+        ])
+        self.assertEqual(results['success'], 1)
+        self.assertEqual(
+            Student.objects.get(student_id='S0005').user.username, 'student_S0001_1'
+        )
+
+    def _import_queries(self, count, offset):
+        records = [
+            (i + 2, {'学号': f'B{offset + i:04d}', '姓名': f'学员{i}', '入学日期': '2024-09-01'})
+            for i in range(count)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            results = StudentBulkImporter().run(records)
+        self.assertEqual(results['success'], count)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.assertEqual(self._import_queries(2, 0), self._import_queries(20, 100))
+
+
+class StudentImportDryRunTest(TestCase):
+    """预检模式报告与正式导入相同的错误行，且不写入数据库"""
+
+    ROWS = [
+        ['学号', '姓名', '入学日期', '状态', '邮箱'],
+        ['S0001', '已有', '2024-09-01', '', ''],
+        ['S0002', '张三', '2024/09/01', '', ''],
+        ['S0003', '李四', '2024-09-01', '未知', ''],
+        ['S0004', '王五', '2024-09-01', '', 'not-an-email'],
+        ['S0005', '赵六', '2024-09-01', '', ''],
+        ['S0005', '赵六', '2024-09-01', '', ''],
+        ['', '', '', '', ''],
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        user = User.objects.create_user(username='student_S0001')
+        Student.objects.create(
+            user=user, student_id='S0001', enrollment_date=date(2024, 9, 1)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _post(self, query):
+        response = self.client.post(
+            f'/api/students/import/{query}', {'file': csv_upload(self.ROWS)}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_dry_run_reports_error_rows(self):
+        results = self._post('?dry_run=1')
+        self.assertEqual(Student.objects.count(), 1)
+        self.assertEqual((results['total'], results['success'], results['failed']), (7, 1, 6))
+        self.assertEqual(results['missing_columns'], [])
+        self.assertEqual(results['errors'], [
+            {'row': 2, 'student_id': 'S0001', 'error': '学号 S0001 已存在'},
+            {'row': 3, 'student_id': 'S0002', 'error': '入学日期格式错误: 2024/09/01'},
+            {'row': 4, 'student_id': 'S0003', 'error': '未知状态: 未知'},
+            {'row': 5, 'student_id': 'S0004', 'error': '邮箱格式错误: not-an-email'},
+            {'row': 7, 'student_id': 'S0005', 'error': '学号 S0005 在文件中重复'},
+            {'row': 8, 'student_id': '未知', 'error': '学号不能为空'},
+            {'row': 8, 'student_id': '未知', 'error': '姓名不能为空'},
+            {'row': 8, 'student_id': '未知', 'error': '入学日期不能为空'},
+        ])
+
+    def test_dry_run_matches_import(self):
+        dry_run = self._post('?dry_run=1')
+        imported = self._post('')
+        self.assertEqual(
+            {error['row'] for error in dry_run['errors']},
+            {error['row'] for error in imported['errors']}
+        )
+        self.assertEqual(dry_run['success'], imported['success'])
+
+    def test_duplicates_are_detected_across_batches(self):
+        batches = [
+            pd.DataFrame({'学号': ['S0010'], '姓名': ['甲'], '入学日期': ['2024-09-01']}, index=[2]),
+            pd.DataFrame({'学号': ['S0010'], '姓名': ['乙'], '入学日期': ['2024-09-01']}, index=[3]),
+        ]
+        results = validate_batches(batches, ['学号', '姓名', '入学日期'])
+        self.assertEqual(results['errors'], [
+            {'row': 3, 'student_id': 'S0010', 'error': '学号 S0010 在文件中重复'},
+        ])
+
+
+class StudentFileReaderTest(TestCase):
+    """导入文件按批流式读取，索引为文件中的行号"""
+
+    def test_xlsx_batches(self):
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.append(['学号', '姓名'])
+        for row in [['S0001', '甲'], ['S0002', '乙'], [None, None], ['S0003', '丙']]:
+            worksheet.append(row)
+        output = BytesIO()
+        workbook.save(output)
+        output.seek(0)
+
+        reader = StudentFileReader(output, 'students.xlsx', batch_size=2)
+        self.assertEqual(reader.columns, ['学号', '姓名'])
+        batches = list(reader.batches())
+        self.assertEqual([list(batch.index) for batch in batches], [[2, 3], [5]])
+        self.assertEqual(list(batches[1]['学号']), ['S0003'])
+
+    def test_csv_keeps_leading_zeros(self):
+        upload = csv_upload([['学号', '电话']] + [[f'{i:05d}', '0123'] for i in range(3)])
+        reader = StudentFileReader(upload, upload.name, batch_size=2)
+        records = list(reader.records())
+        self.assertEqual([row for row, _ in records], [2, 3, 4])
+        self.assertEqual(records[0][1], {'学号': '00000', '电话': '0123'})
+
+    def test_header_only_file(self):
+        reader = StudentFileReader(csv_upload([['学号', '姓名']]), 'students.csv')
+        self.assertEqual(reader.columns, ['学号', '姓名'])
+        self.assertEqual(list(reader.records()), [])
+
+
+class StudentUpsertImportTest(TestCase):
+    """upsert 导入只更新有变化的字段"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(2):
+            user = User.objects.create_user(
+                username=f'student_{i}', first_name=f'学员{i}', phone='13800000000'
+            )
+            Student.objects.create(
+                user=user,
+                student_id=f'S{i:04d}',
+                department='计算机学院',
+                grade='2024',
+                enrollment_date=date(2024, 9, 1),
+            )
+
+    def test_upsert_diffs_existing_rows(self):
+        versions = dict(Student.objects.values_list('student_id', 'version'))
+        results = StudentBulkImporter(mode='upsert').run([
+            (2, {'学号': 'S0000', '姓名': '学员0', '院系': '外语学院'}),
+            (3, {'学号': 'S0001', '姓名': '学员1', '院系': '计算机学院'}),
+            (4, {'学号': 'S0002', '姓名': '新学员', '院系': '外语学院', '入学日期': '2025-09-01'}),
+            (5, {'学号': 'S0002', '姓名': '新学员', '院系': '外语学院', '入学日期': '2025-09-01'}),
+        ])
+        self.assertEqual(
+            {key: results[key] for key in ('success', 'failed', 'created', 'updated', 'unchanged')},
+            {'success': 3, 'failed': 1, 'created': 1, 'updated': 1, 'unchanged': 1}
+        )
+        self.assertEqual(results['errors'][0]['error'], '学号 S0002 在文件中重复')
+
+        changed = Student.objects.select_related('user').get(student_id='S0000')
+        self.assertEqual(changed.department, '外语学院')
+        # 文件中没有的列保持原值
+        self.assertEqual(changed.grade, '2024')
+        self.assertEqual(changed.enrollment_date, date(2024, 9, 1))
+        self.assertEqual(changed.user.phone, '13800000000')
+        self.assertGreater(changed.version, versions['S0000'])
+
+        unchanged = Student.objects.get(student_id='S0001')
+        self.assertEqual(unchanged.version, versions['S0001'])
+        self.assertEqual(Student.objects.get(student_id='S0002').department, '外语学院')
+
+    def test_update_only_writes_changed_fields(self):
+        records = [
+            (i + 2, {'学号': f'S{i:04d}', '姓名': f'学员{i}', '年级': '2025'}) for i in range(2)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            results = StudentBulkImporter(mode='upsert').run(records)
+        self.assertEqual(results['updated'], 2)
+        updates = [
+            query['sql'] for query in ctx.captured_queries
+            if re.match(r'UPDATE\W+students_student\W+SET\W+grade', query['sql'])
+        ]
+        # 两条记录的变化字段相同，一次 bulk_update
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('department', updates[0])
+
+
+def image_bytes(image_format='JPEG', size=(40, 30), color=(200, 30, 30)):
+    output = BytesIO()
+    Image.new('RGB', size, color).save(output, image_format)
+    return output.getvalue()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StudentPhotoArchiveImportTest(TransactionTestCase):
+    """
+    ZIP 压缩包中的相片按文件名中的学号导入
+
+    相片在线程池中写入存储，各线程使用自己的数据库连接，因此不能包在测试事务中。
+    """
+
+    def setUp(self):
+        use_temp_media_root(self)
+        self.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        self.students = []
+        for i in range(2):
+            user = User.objects.create_user(username=f'student_{i}')
+            self.students.append(Student.objects.create(
+                user=user, student_id=f'S{i:04d}', enrollment_date=date(2024, 9, 1)
+            ))
+
+    def _archive(self, members):
+        output = BytesIO()
+        with zipfile.ZipFile(output, 'w') as archive:
+            for name, data in members:
+                archive.writestr(name, data)
+        return SimpleUploadedFile('photos.zip', output.getvalue(), content_type='application/zip')
+
+    def test_import_by_student_id(self):
+        upload = self._archive([
+            ('S0000.jpg', image_bytes()),
+            ('班级/S0001.png', image_bytes('PNG')),
+            ('S9999.jpg', image_bytes()),
+            ('S0000.txt', b'not an image'),
+            ('__MACOSX/._S0000.jpg', b''),
+            ('.DS_Store', b''),
+        ])
+        # SQLite 内存数据库不支持多个连接并发写入，只用一个线程；缩略图在提交后同步生成
+        with mock.patch.object(images, 'RENDITION_WORKERS', 0):
+            results = import_photo_archive(upload, primary=True, threads=1)
+        self.assertEqual((results['total'], results['success'], results['failed']), (4, 2, 2))
+        self.assertEqual(
+            sorted(error['filename'] for error in results['errors']), ['S0000.txt', 'S9999.jpg']
+        )
+
+        for student in self.students:
+            student.refresh_from_db()
+            photo = student.photos.get()
+            self.assertTrue(photo.is_primary)
+            self.assertEqual(student.primary_photo_id, photo.pk)
+            self.assertTrue(photo.photo.name.endswith('.jpg'))
+            self.assertEqual(set(photo.renditions), {str(size) for size in images.RENDITION_SIZES})
+
+    def test_invalid_archive(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        upload = SimpleUploadedFile('photos.zip', b'not a zip')
+        response = client.post(
+            '/api/students/photos/import-zip/', {'file': upload}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': '无效的ZIP文件'})
+
+
+class StudentPhotoArchiveExportTest(TestCase):
+    """打包下载的相片按学员列表的过滤条件筛选，以流式响应返回"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        cls.students = []
+        for i, department in enumerate(['计算机学院', '外语学院']):
+            user = User.objects.create_user(username=f'student_{i}')
+            cls.students.append(Student.objects.create(
+                user=user,
+                student_id=f'S{i:04d}',
+                department=department,
+                enrollment_date=date(2024, 9, 1),
+            ))
+
+    def setUp(self):
+        use_temp_media_root(self)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.photos = [
+            StudentPhoto.objects.create(
+                student=student, photo=ContentFile(f'photo {i}'.encode(), name='photo.jpg')
+            )
+            for i, student in enumerate(self.students)
+        ]
+        self.photos[0].make_primary()
+
+    def _entries(self, **params):
+        response = self.client.get('/api/students/photos/export-zip/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+
+    def test_filters_and_entry_names(self):
+        entries = self._entries(department='计算机')
+        self.assertEqual(entries, {f'S0000/{self.photos[0].pk}.jpg': b'photo 0'})
+
+        entries = self._entries()
+        self.assertEqual(set(entries), {
+            f'S0000/{self.photos[0].pk}.jpg', f'S0001/{self.photos[1].pk}.jpg'
+        })
+
+    def test_primary_only(self):
+        self.assertEqual(list(self._entries(primary='1')), [f'S0000/{self.photos[0].pk}.jpg'])
+
+    def test_missing_file_is_skipped(self):
+        storage = StudentPhoto._meta.get_field('photo').storage
+        os.remove(storage.path(self.photos[1].photo.name))
+        with self.assertLogs('apps.students.archives', 'WARNING'):
+            entries = self._entries()
+        self.assertEqual(list(entries), [f'S0000/{self.photos[0].pk}.jpg'])
+
+
+class ProtectedMediaTest(TestCase):
+    """媒体文件只能通过带签名、未过期的地址访问"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        use_temp_media_root(self)
+        self.client = APIClient()
+        self.name = default_storage.save('documents/notes.txt', ContentFile(b'0123456789'))
+
+    def _get(self, url, **headers):
+        return self.client.get(url, headers=headers)
+
+    def _body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_signed_url_serves_file(self):
+        url = default_storage.url(self.name)
+        response = self._get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._body(response), b'0123456789')
+
+        self.assertEqual(self._get(url, If_None_Match=response['ETag']).status_code, 304)
+
+        response = self._get(url, Range='bytes=2-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(self._body(response), b'234')
+
+        self.assertEqual(self._get(url, Range='bytes=20-').status_code, 416)
+
+    def test_invalid_or_expired_signature(self):
+        self.assertEqual(self._get(f'/media/{self.name}').status_code, 403)
+
+        url = default_storage.url(self.name)
+        self.assertEqual(self._get(url.replace('signature=', 'signature=x')).status_code, 403)
+        # 签名只对该路径有效
+        other = default_storage.save('documents/other.txt', ContentFile(b'other'))
+        self.assertEqual(self._get(url.replace(self.name, other)).status_code, 403)
+
+        expires, signature = sign_media_name(self.name, now=time.time() - 3 * MEDIA_URL_MAX_AGE)
+        response = self._get(f'/media/{self.name}?expires={expires}&signature={signature}')
+        self.assertEqual(response.status_code, 403)
+
+    def test_dot_paths_are_not_served(self):
+        name = default_storage.save('.uploads/partial.bin', ContentFile(b'partial'))
+        self.assertEqual(self._get(default_storage.url(name)).status_code, 404)
+
+    def test_job_files_require_owner(self):
+        job = StudentJob.objects.create(job_type='export', created_by=self.owner)
+        job.result_file.save('export.csv', ContentFile(b'student_id\n'))
+        url = job.result_file.url
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self._get(url).status_code, 403)
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self._get(url).status_code, 200)
+
+    def test_offload_to_nginx(self):
+        with mock.patch.object(media, 'MEDIA_SERVE_BACKEND', 'nginx'):
+            response = self._get(default_storage.url(self.name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PrimaryPhotoTest(TestCase):
+    """每个学员最多一张主相片，学员的主相片指针随之切换"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        students = []
+        for i in range(2):
+            user = User.objects.create_user(username=f'student_{i}')
+            students.append(Student.objects.create(
+                user=user, student_id=f'S{i:04d}', enrollment_date=date(2024, 9, 1)
+            ))
+        cls.student, cls.other_student = students
+        cls.photos = [
+            StudentPhoto.objects.create(student=cls.student, photo=f'student_photos/{i}.jpg')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def assertPrimary(self, photo):
+        primary = StudentPhoto.objects.filter(student=self.student, is_primary=True)
+        self.assertEqual(list(primary), [photo] if photo else [])
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.primary_photo, photo)
+
+    def test_make_primary_switches(self):
+        self.photos[0].make_primary()
+        self.assertPrimary(self.photos[0])
+        self.photos[1].make_primary()
+        self.assertPrimary(self.photos[1])
+        self.photos[1].clear_primary()
+        self.assertPrimary(None)
+
+    def test_patch_switches_primary(self):
+        self.photos[0].make_primary()
+        response = self.client.patch(
+            f'/api/photos/{self.photos[2].pk}/',
+            {'is_primary': True, 'student': self.other_student.pk},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertPrimary(self.photos[2])
+        # student 只读，相片不能转给其他学员
+        self.assertEqual(response.data['student'], self.student.pk)
+
+        response = self.client.get(f'/api/students/{self.student.pk}/', {'fields': 'primary_photo'})
+        self.assertEqual(response.data['primary_photo']['id'], self.photos[2].pk)
+
+    def test_deleting_primary_clears_pointer(self):
+        self.photos[0].make_primary()
+        self.photos[0].delete()
+        self.assertPrimary(None)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PhotoNormalizationTest(TestCase):
+    """上传的相片按实际格式识别，旋转、缩小并重新编码"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        user = User.objects.create_user(username='student_0')
+        cls.student = Student.objects.create(
+            user=user, student_id='S0000', enrollment_date=date(2024, 9, 1)
+        )
+
+    def setUp(self):
+        use_temp_media_root(self)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_prepare_photo_rotates_resizes_and_strips_exif(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = 'Camera Maker'
+        output = BytesIO()
+        Image.new('RGB', (4000, 1000), 'white').save(output, 'JPEG', exif=exif)
+
+        fields = prepare_photo(SimpleUploadedFile('portrait.JPG', output.getvalue()))
+        self.assertEqual(fields['photo'].name, 'portrait.jpg')
+        with Image.open(fields['photo']) as image:
+            self.assertEqual(image.format, 'JPEG')
+            # 按 EXIF 方向旋转为竖版，最长边缩小到上限
+            self.assertEqual(image.size, (512, images.PHOTO_MAX_DIMENSION))
+            self.assertEqual(dict(image.getexif()), {})
+
+    def test_prepare_photo_rejects_non_images(self):
+        with self.assertRaisesMessage(ValueError, '无法识别的图片文件'):
+            prepare_photo(SimpleUploadedFile('fake.jpg', b'not an image'))
+
+    def test_upload_stores_normalized_photo(self):
+        upload = SimpleUploadedFile('photo.png', image_bytes('PNG', size=(3000, 1500)))
+        response = self.client.post(
+            f'/api/students/{self.student.pk}/photos/', {'photo': upload}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 201)
+        photo = StudentPhoto.objects.get(pk=response.data['id'])
+        self.assertTrue(photo.photo.name.endswith('.jpg'))
+        with photo.photo.open('rb') as f, Image.open(f) as image:
+            self.assertEqual(image.size, (images.PHOTO_MAX_DIMENSION, 1024))
+        self.assertIsNotNone(photo.phash)
+
+    def test_patch_cannot_replace_file(self):
+        photo = StudentPhoto.objects.create(
+            student=self.student, photo=ContentFile(image_bytes(), name='photo.jpg')
+        )
+        name = photo.photo.name
+        replacement = SimpleUploadedFile('other.png', image_bytes('PNG', color=(0, 0, 255)))
+        response = self.client.patch(
+            f'/api/photos/{photo.pk}/',
+            {'photo': replacement, 'description': '新的说明'},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 200)
+        photo.refresh_from_db()
+        self.assertEqual(photo.description, '新的说明')
+        self.assertEqual(photo.photo.name, name)
+
+
+class StudentSearchTest(TestCase):
+    """学员搜索匹配学号、姓名、拼音全拼和首字母"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        cls.students = {}
+        for username, last_name, first_name, student_id, department in [
+            ('zhang3', '张', '三', '2024001', '计算机学院'),
+            ('lisi', '李', '四', '2024002', '外语学院'),
+            ('wangwu', '王', '五', '2025003', '计算机学院'),
+        ]:
+            user = User.objects.create_user(
+                username=username, first_name=first_name, last_name=last_name
+            )
+            cls.students[username] = Student.objects.create(
+                user=user,
+                student_id=student_id,
+                department=department,
+                enrollment_date=date(2024, 9, 1),
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _search(self, search):
+        response = self.client.get('/api/students/', {'search': search})
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['student_id'] for row in response.data['data'])
+
+    def test_search_terms(self):
+        self.assertEqual(self._search('张三'), ['2024001'])
+        self.assertEqual(self._search('zhangsan'), ['2024001'])
+        self.assertEqual(self._search('zs'), ['2024001'])
+        self.assertEqual(self._search('2024'), ['2024001', '2024002'])
+        self.assertEqual(self._search('计算机'), ['2024001', '2025003'])
+        self.assertEqual(self._search('计算机 wang'), ['2025003'])
+        self.assertEqual(self._search('lisi'), ['2024002'])
+        self.assertEqual(self._search('赵'), [])
+
+    def test_document_follows_name_change(self):
+        user = self.students['lisi'].user
+        user.first_name = '小四'
+        user.save()
+        self.assertEqual(self._search('lxs'), ['2024002'])
+        self.assertEqual(self._search('ls'), [])
+
+        self.students['lisi'].delete()
+        self.assertEqual(self._search('lxs'), [])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StudentStatsTest(TestCase):
+    """统计计数随学员的新增、修改、删除和批量导入增量更新"""
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+
+    def _create(self, student_id, **fields):
+        user = User.objects.create_user(username=f'student_{student_id}')
+        return Student.objects.create(
+            user=user, student_id=student_id, enrollment_date=date(2024, 9, 1), **fields
+        )
+
+    def _stats(self):
+        response = self.client.get('/api/students/stats/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertCountersMatch(self):
+        counters = {
+            tuple(getattr(counter, field) for field in STATS_FIELDS): counter.count
+            for counter in StudentStatsCounter.objects.filter(count__gt=0)
+        }
+        self.assertEqual(counters, count_students(Student.objects.all()))
+
+    def test_counters_follow_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self._create('S0001', department='计算机学院')
+            self._create('S0002', department='外语学院')
+        stats = self._stats()
+        self.assertEqual(stats['total_students'], 2)
+        self.assertEqual(stats['active_students'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.status = 'graduated'
+            first.save()
+        stats = self._stats()
+        self.assertEqual((stats['active_students'], stats['graduated_students']), (1, 1))
+        self.assertIn(
+            {'status': 'graduated', 'department': '计算机学院', 'grade': '', 'count': 1},
+            stats['breakdown']
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentBulkImporter().run([
+                (2, {'学号': 'S0003', '姓名': '导入', '入学日期': '2024-09-01', '状态': '休学'}),
+            ])
+            first.delete()
+        stats = self._stats()
+        self.assertEqual(stats['total_students'], 2)
+        self.assertEqual(stats['by_status']['suspended'], 1)
+        self.assertEqual(stats['graduated_students'], 0)
+        self.assertCountersMatch()
+
+    def test_cached_until_counters_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create('S0001')
+        self.assertEqual(self._stats()['total_students'], 1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self._stats()
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create('S0002')
+        self.assertEqual(self._stats()['total_students'], 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ResponseCacheTest(TestCase):
+    """接口响应按标签缓存，数据修改提交后相关标签失效"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        cls.teacher = User.objects.create_user(username='teacher', user_type='teacher')
+        students = []
+        for i in range(2):
+            user = User.objects.create_user(username=f'student_{i}')
+            students.append(Student.objects.create(
+                user=user, student_id=f'S{i:04d}', enrollment_date=date(2024, 9, 1)
+            ))
+        cls.student, cls.other_student = students
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _get(self, student, **params):
+        response = self.client.get(f'/api/students/{student.pk}/', params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_hit_and_invalidation(self):
+        self.assertEqual(self._get(self.student)['X-Cache'], 'MISS')
+        self._get(self.other_student)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._get(self.student)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        # 只查询学员的版本号用于 ETag
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.student.department = '外语学院'
+            self.student.save()
+            # 提交前不失效，避免并发请求以新版本号写回旧数据
+            self.assertEqual(self._get(self.student)['X-Cache'], 'HIT')
+        for callback in callbacks:
+            callback()
+
+        response = self._get(self.student)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['department'], '外语学院')
+        # 其他学员的缓存不受影响
+        self.assertEqual(self._get(self.other_student)['X-Cache'], 'HIT')
+
+    def test_child_record_invalidates_student(self):
+        self._get(self.student)
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentAchievement.objects.create(
+                student=self.student,
+                achievement_type='academic',
+                title='成就',
+                date_achieved=date(2025, 1, 1),
+            )
+        response = self._get(self.student)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['achievements']), 1)
+
+    def test_key_varies_by_query_and_role(self):
+        self._get(self.student, fields='student_id', expand='photos')
+        # 参数顺序不同视为同一请求
+        response = self.client.get(
+            f'/api/students/{self.student.pk}/?expand=photos&fields=student_id'
+        )
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(self._get(self.student, fields='status')['X-Cache'], 'MISS')
+
+        self.client.force_authenticate(self.teacher)
+        self.assertEqual(
+            self._get(self.student, fields='student_id', expand='photos')['X-Cache'], 'MISS'
+        )
+
+    def test_invalidate_tags_changes_version(self):
+        cache = get_cache()
+        before = tag_versions(cache, ['student:1', 'student:2'])
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_tags('student:1')
+        after = tag_versions(cache, ['student:1', 'student:2'])
+        self.assertNotEqual(before[0], after[0])
+        self.assertEqual(before[1], after[1])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StudentConditionalGetTest(TestCase):
+    """学员资源的 ETag 按表示区分，未修改时返回 304"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='admin', password='admin123', user_type='admin'
+        )
+        user = User.objects.create_user(username='student_0')
+        cls.student = Student.objects.create(
+            user=user, student_id='S0000', enrollment_date=date(2024, 9, 1)
+        )
+
+    def setUp(self):
+        get_cache().clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = f'/api/students/{self.student.pk}/'
+
+    def _get(self, params=None, **headers):
+        return self.client.get(self.url, params, headers=headers)
+
+    def test_not_modified(self):
+        response = self._get()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertIn('Accept', response['Vary'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        # 只有 If-Modified-Since 时不返回 304
+        response = self._get(If_Modified_Since=response['Last-Modified'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_each_representation_has_its_own_etag(self):
+        etag = self._get()['ETag']
+        response = self._get({'fields': 'student_id'}, If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self._get(Accept='text/html', If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_changes_produce_new_etag(self):
+        etag = self._get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentContact.objects.create(student=self.student, parent_name='家长')
+        response = self._get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['contact_info']['parent_name'], '家长')
+
+    def test_photo_list_etag(self):
+        url = f'/api/students/{self.student.pk}/photos/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        name = 'student_photos/a.jpg'
+        with self.captureOnCommitCallbacks(execute=True):
+            # 带上缩略图路径，不安排后台生成缩略图
+            StudentPhoto.objects.create(
+                student=self.student, photo=name, renditions=images.expected_renditions(name)
+            )
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
@@ -7,6 +7,7 @@ urlpatterns = [
     # 学员管理
     path('students/', views.StudentListView.as_view(), name='student-list'),
     path('students/<int:pk>/', views.StudentDetailView.as_view(), name='student-detail'),
+    path('students/suggest/', views.StudentSuggestView.as_view(), name='student-suggest'),
     
     # 学员联系信息
     path('students/<int:student_id>/contact/', views.StudentContactView.as_view(), name='student-contact'),
@@ -22,8 +23,15 @@ urlpatterns = [
     path('students/export/', views.StudentExportView.as_view(), name='student-export'),
     path('students/import/', views.StudentImportView.as_view(), name='student-import'),
     
+    # 后台导入导出任务
+    path('students/jobs/<int:job_id>/', views.StudentJobDetailView.as_view(), name='student-job-detail'),
+    path('students/jobs/<int:job_id>/download/', views.StudentJobDownloadView.as_view(), name='student-job-download'),
+    
     # 学员相片管理
     path('students/<int:student_id>/photos/', views.StudentPhotoListView.as_view(), name='student-photo-list'),
     path('photos/<int:photo_id>/', views.StudentPhotoDetailView.as_view(), name='student-photo-detail'),
     path('students/<int:student_id>/photos/batch-upload/', views.StudentPhotoBatchUploadView.as_view(), name='student-photo-batch-upload'),
+    path('students/photos/import-zip/', views.StudentPhotoArchiveImportView.as_view(), name='student-photo-archive-import'),
+    path('students/photos/export-zip/', views.StudentPhotoArchiveExportView.as_view(), name='student-photo-archive-export'),
+    path('students/photos/duplicates/', views.StudentPhotoDuplicateView.as_view(), name='student-photo-duplicates'),
 ]
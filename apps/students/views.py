@@ -2,51 +2,98 @@ from rest_framework import status, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
-from django.db.models import Q
-from django.http import HttpResponse
-import pandas as pd
-import io
-import json
-from datetime import datetime
-from .models import Student, StudentContact, StudentAchievement, StudentPhoto
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import FileResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from functools import wraps
+import hashlib
+from pxweb.response_cache import cache_response, normalized_query
+from pxweb.storage import media_url_window
+from .models import (
+    STUDENT_FILTER_PARAMS, Student, StudentContact, StudentAchievement, StudentPhoto, StudentJob
+)
+from .pagination import StudentCursorPagination
+from .importers import (
+    IMPORT_MODES, REQUIRED_COLUMNS, StudentBulkImporter, import_message, validate_batches
+)
+from .readers import IMPORT_EXTENSIONS, StudentFileReader
+from .images import MAX_PHOTO_SIZE, prepare_photo, save_photo_batch
+from .archives import import_photo_archive, photo_archive_response
+from .duplicates import DEFAULT_THRESHOLD, cached_photo_clusters
+from . import stats
+from .suggest import SUGGEST_LIMIT, SUGGEST_MAX_LIMIT, SUGGEST_THUMBNAIL_SIZE, suggest_students
+from .exports import EXPORT_FORMATS, ExportContentNegotiation, export_response
 from .serializers import (
     StudentSerializer, StudentCreateSerializer, StudentUpdateSerializer,
     StudentContactUpdateSerializer, StudentAchievementSerializer,
     StudentAchievementCreateSerializer, StudentPhotoSerializer,
-    StudentPhotoCreateSerializer
+    StudentPhotoCreateSerializer, StudentJobSerializer, resolve_student_fields
 )
 
 
+def get_student_filters(request):
+    """学员列表、导出共用的过滤条件"""
+    return {
+        key: request.query_params.get(key, '')
+        for key in STUDENT_FILTER_PARAMS
+    }
+
+
+def student_conditional(lookup):
+    """
+    为单个学员的资源添加 ETag/Last-Modified，并处理条件请求
+
+    lookup 为 URL 中学员ID的参数名。先只查询学员的版本号和修改时间，
+    If-None-Match 与当前 ETag 相符时直接返回 304，不加载数据也不运行序列化器。
+    ETag 包含查询参数（fields/expand 等）、渲染格式和主机的摘要，不同表示各有自己的 ETag；
+    还包含媒体签名地址的时间窗口，客户端不会以 304 继续使用含已过期相片地址的旧数据。
+    Last-Modified 只精确到秒，一秒内的多次修改无法区分，因此不处理 If-Modified-Since，
+    只以 ETag 判断。
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            state = Student.objects.filter(pk=kwargs[lookup]).values_list(
+                'version', 'updated_at'
+            ).first()
+            if state is None:
+                return method(view, request, *args, **kwargs)
+            
+            version, updated_at = state
+            variant = hashlib.sha256('|'.join([
+                request.get_host(), normalized_query(request), request.accepted_renderer.format,
+                str(media_url_window())
+            ]).encode()).hexdigest()[:16]
+            etag = f'"{kwargs[lookup]}-{version}-{variant}"'
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(updated_at.timestamp())
+                # 客户端可缓存，但每次使用前需验证
+                response['Cache-Control'] = 'private, no-cache'
+                patch_vary_headers(response, ['Accept'])
+            return response
+        return wrapper
+    return decorator
+
+
 class StudentListView(APIView):
     permission_classes = [permissions.IsAuthenticated]  # 恢复需要认证
     
     def get(self, request):
-        # 支持搜索和过滤
-        search = request.query_params.get('search', '')
-        status_filter = request.query_params.get('status', '')
-        department_filter = request.query_params.get('department', '')
         page = request.query_params.get('page', 1)
         page_size = request.query_params.get('page_size', 20)
+        fields = resolve_student_fields(request.query_params)
         
-        students = Student.objects.all()
-        
-        # 搜索功能
-        if search:
-            students = students.filter(
-                Q(student_id__icontains=search) |
-                Q(user__username__icontains=search) |
-                Q(user__first_name__icontains=search) |
-                Q(user__last_name__icontains=search) |
-                Q(department__icontains=search)
-            )
-        
-        # 状态过滤
-        if status_filter:
-            students = students.filter(status=status_filter)
-        
-        # 院系过滤
-        if department_filter:
-            students = students.filter(department__icontains=department_filter)
+        # 支持搜索和过滤
+        students = Student.objects.for_serializer(fields).filter_by_params(
+            **get_student_filters(request)
+        )
         
         # 分页
         try:
@@ -55,6 +102,28 @@ class StudentListView(APIView):
         except ValueError:
             page = 1
             page_size = 20
+        
+        # 游标分页：传入 cursor 参数（首页可为空）时启用，不统计总数
+        if 'cursor' in request.query_params:
+            paginator = StudentCursorPagination(page_size=page_size)
+            try:
+                students, next_cursor, previous_cursor = paginator.paginate_queryset(
+                    students, request.query_params.get('cursor', '')
+                )
+            except ValueError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            serializer = StudentSerializer(students, many=True, fields=fields)
+            return Response({
+                'data': serializer.data,
+                'pagination': {
+                    'page_size': paginator.page_size,
+                    'next_cursor': next_cursor,
+                    'previous_cursor': previous_cursor
+                }
+            })
             
         total_count = students.count()
         total_pages = (total_count + page_size - 1) // page_size
@@ -63,7 +132,7 @@ class StudentListView(APIView):
         end = start + page_size
         students = students[start:end]
         
-        serializer = StudentSerializer(students, many=True)
+        serializer = StudentSerializer(students, many=True, fields=fields)
         return Response({
             'data': serializer.data,
             'pagination': {
@@ -87,10 +156,48 @@ class StudentListView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class StudentSuggestView(APIView):
+    """
+    学员选择器的输入提示
+    
+    按学号、姓名、拼音全拼或首字母前缀匹配，只返回 id、显示文本和主相片缩略图；
+    匹配在进程内的前缀索引中完成，数据库只按主键查询一次缩略图；
+    索引首次构建完成前退回到数据库前缀查询。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', SUGGEST_LIMIT))
+        except ValueError:
+            limit = SUGGEST_LIMIT
+        limit = min(max(limit, 1), SUGGEST_MAX_LIMIT)
+        
+        matches = suggest_students(request.query_params.get('search', ''), limit)
+        if not matches:
+            return Response({'data': []})
+        
+        # 同时过滤掉其他进程中已删除、本进程索引尚未同步的学员
+        renditions = dict(
+            Student.objects.filter(pk__in=[pk for pk, _ in matches])
+            .values_list('pk', 'primary_photo__renditions')
+        )
+        data = []
+        for pk, label in matches:
+            if pk not in renditions:
+                continue
+            name = (renditions[pk] or {}).get(SUGGEST_THUMBNAIL_SIZE)
+            thumbnail = request.build_absolute_uri(default_storage.url(name)) if name else None
+            data.append({'id': pk, 'label': label, 'thumbnail': thumbnail})
+        return Response({'data': data})
+
+
 class StudentPhotoListView(APIView):
     """学员相片列表和上传"""
     permission_classes = [permissions.IsAuthenticated]
     
+    @student_conditional('student_id')
+    @cache_response('student:{student_id}')
     def get(self, request, student_id):
         """获取学员相片列表"""
         try:
@@ -125,28 +232,34 @@ class StudentPhotoListView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 检查文件类型
+        # 检查文件大小（限制为5MB）
         photo_file = request.FILES['photo']
-        if not photo_file.content_type.startswith('image/'):
+        if photo_file.size > MAX_PHOTO_SIZE:
             return Response(
-                {'error': f'文件类型必须是图片，当前类型: {photo_file.content_type}'},
+                {'error': f'文件大小不能超过5MB，当前大小: {photo_file.size} bytes'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 检查文件大小（限制为5MB）
-        if photo_file.size > 5 * 1024 * 1024:
+        # 按实际内容识别格式，旋转、缩小并重新编码
+        try:
+            fields = prepare_photo(photo_file)
+        except ValueError as e:
             return Response(
-                {'error': f'文件大小不能超过5MB，当前大小: {photo_file.size} bytes'},
+                {'error': str(e)},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 准备数据
-        data = request.data.copy()
-        data['student'] = student.id
+        # 准备数据（不复制 request.data，较大的上传文件是临时文件，无法深拷贝）
+        data = {
+            'student': student.id,
+            'photo': fields.pop('photo'),
+            'description': request.data.get('description', ''),
+            'is_primary': request.data.get('is_primary', False),
+        }
         
         serializer = StudentPhotoCreateSerializer(data=data)
         if serializer.is_valid():
-            photo = serializer.save()
+            photo = serializer.save(**fields)
             photo_serializer = StudentPhotoSerializer(
                 photo,
                 context={'request': request}
@@ -207,13 +320,6 @@ class StudentPhotoDetailView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # 如果设置为primary，取消其他相片的primary状态
-        if request.data.get('is_primary', False):
-            StudentPhoto.objects.filter(
-                student=photo.student, 
-                is_primary=True
-            ).update(is_primary=False)
-        
         serializer = StudentPhotoSerializer(
             photo, 
             data=request.data, 
@@ -221,7 +327,14 @@ class StudentPhotoDetailView(APIView):
             context={'request': request}
         )
         if serializer.is_valid():
-            serializer.save()
+            # 主相片通过 make_primary/clear_primary 加锁切换，取消其他相片的primary状态
+            is_primary = serializer.validated_data.pop('is_primary', None)
+            with transaction.atomic():
+                photo = serializer.save()
+                if is_primary:
+                    photo.make_primary()
+                elif is_primary is False and photo.is_primary:
+                    photo.clear_primary()
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -248,38 +361,7 @@ class StudentPhotoBatchUploadView(APIView):
             )
         
         photos = request.FILES.getlist('photos')
-        results = {
-            'total': len(photos),
-            'success': 0,
-            'failed': 0,
-            'errors': []
-        }
-        
-        for index, photo_file in enumerate(photos):
-            try:
-                # 检查文件类型
-                if not photo_file.content_type.startswith('image/'):
-                    raise ValueError('文件类型必须是图片')
-                
-                # 检查文件大小（限制为5MB）
-                if photo_file.size > 5 * 1024 * 1024:
-                    raise ValueError('文件大小不能超过5MB')
-                
-                # 创建相片记录
-                photo = StudentPhoto.objects.create(
-                    student=student,
-                    photo=photo_file,
-                    description=f"相片 {index + 1}"
-                )
-                results['success'] += 1
-                
-            except Exception as e:
-                results['failed'] += 1
-                results['errors'].append({
-                    'index': index,
-                    'filename': photo_file.name,
-                    'error': str(e)
-                })
+        results = save_photo_batch(student, photos)
         
         return Response({
             'message': f'批量上传完成，成功: {results["success"]}, 失败: {results["failed"]}',
@@ -287,23 +369,129 @@ class StudentPhotoBatchUploadView(APIView):
         })
 
 
+class StudentPhotoArchiveImportView(APIView):
+    """
+    从ZIP压缩包批量导入学员相片
+    
+    压缩包中每个文件以学号命名（如 2024001.jpg）；primary=1 时设为学员的主相片。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        if 'file' not in request.FILES:
+            return Response(
+                {'error': '请上传ZIP文件'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file = request.FILES['file']
+        if not file.name.lower().endswith('.zip'):
+            return Response(
+                {'error': '只支持ZIP文件'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        primary = str(request.data.get('primary', '')).lower() in ('1', 'true')
+        try:
+            results = import_photo_archive(file, primary=primary)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'message': f'相片导入完成，成功: {results["success"]}, 失败: {results["failed"]}',
+            'results': results
+        })
+
+
+class StudentPhotoArchiveExportView(APIView):
+    """
+    打包下载学员相片（ZIP），支持与学员列表相同的过滤条件
+    
+    压缩包内文件按 学号/相片ID 命名；primary=1 时只包含主相片。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        students = Student.objects.filter_by_params(**get_student_filters(request))
+        photos = StudentPhoto.objects.filter(student__in=students)
+        if request.query_params.get('primary') in ('1', 'true'):
+            photos = photos.filter(is_primary=True)
+        return photo_archive_response(photos)
+
+
+class StudentPhotoDuplicateView(APIView):
+    """
+    查找近似重复的学员相片
+    
+    scope=student（默认）只比较同一学员的相片，scope=all 在全部相片中查找；
+    threshold 为允许的最大汉明距离（0-64），student 可限定为某个学员。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        scope = request.query_params.get('scope', 'student')
+        if scope not in ('student', 'all'):
+            return Response(
+                {'error': 'scope 只能是 student 或 all'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            threshold = int(request.query_params.get('threshold', DEFAULT_THRESHOLD))
+        except ValueError:
+            threshold = -1
+        if not 0 <= threshold <= 64:
+            return Response(
+                {'error': 'threshold 必须是 0-64 之间的整数'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        clusters = cached_photo_clusters(
+            threshold=threshold,
+            per_student=(scope == 'student'),
+            student_id=request.query_params.get('student')
+        )
+        
+        # 一次查询取出所有簇中的相片
+        photo_map = StudentPhoto.objects.in_bulk(
+            [photo_id for cluster in clusters for photo_id in cluster]
+        )
+        data = [
+            StudentPhotoSerializer(
+                [photo_map[photo_id] for photo_id in cluster if photo_id in photo_map],
+                many=True,
+                context={'request': request}
+            ).data
+            for cluster in clusters
+        ]
+        return Response({
+            'count': len(data),
+            'clusters': data
+        })
+
+
 class StudentDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
-    def get_object(self, pk):
+    def get_object(self, pk, fields=None):
         try:
-            return Student.objects.get(pk=pk)
+            return Student.objects.for_serializer(fields).get(pk=pk)
         except Student.DoesNotExist:
             return None
     
+    @student_conditional('pk')
+    @cache_response('student:{pk}')
     def get(self, request, pk):
-        student = self.get_object(pk)
+        fields = resolve_student_fields(request.query_params)
+        student = self.get_object(pk, fields)
         if student is None:
             return Response(
                 {'error': '学员不存在'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        serializer = StudentSerializer(student)
+        serializer = StudentSerializer(student, fields=fields)
         return Response(serializer.data)
     
     def put(self, request, pk):
@@ -341,6 +529,7 @@ class StudentContactView(APIView):
         except (Student.DoesNotExist, StudentContact.DoesNotExist):
             return None
     
+    @cache_response('student:{student_id}')
     def get(self, request, student_id):
         contact_info = self.get_object(student_id)
         if contact_info is None:
@@ -372,6 +561,8 @@ class StudentContactView(APIView):
 class StudentAchievementListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
+    @student_conditional('student_id')
+    @cache_response('student:{student_id}')
     def get(self, request, student_id):
         try:
             student = Student.objects.get(pk=student_id)
@@ -457,65 +648,73 @@ class StudentAchievementDetailView(APIView):
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def student_stats(request):
-    """学员统计信息"""
-    total_students = Student.objects.count()
-    active_students = Student.objects.filter(status='active').count()
-    graduated_students = Student.objects.filter(status='graduated').count()
-    
-    return Response({
-        'total_students': total_students,
-        'active_students': active_students,
-        'graduated_students': graduated_students
-    })
+    """学员统计信息：总数、各状态人数和按 状态×院系×年级 的明细，读取缓存的计数表"""
+    return Response(stats.student_stats())
+
+
+def is_background(request):
+    return request.query_params.get('background') in ('1', 'true')
+
+
+def is_dry_run(request):
+    return request.query_params.get('dry_run') in ('1', 'true')
+
+
+def job_accepted_response(job, request):
+    return Response(
+        {
+            'message': '任务已提交，请通过 status_url 查询进度',
+            'job_id': job.id,
+            'status_url': request.build_absolute_uri(
+                reverse('students:student-job-detail', args=[job.id])
+            )
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
 
 
 class StudentExportView(APIView):
-    """导出学员数据为Excel文件"""
+    """导出学员数据（xlsx/csv/ndjson/parquet），支持与学员列表相同的过滤条件"""
     permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = ExportContentNegotiation
     
     def get(self, request):
-        # 获取所有学员数据
-        students = Student.objects.all().select_related('user')
-        
-        # 准备数据
-        data = []
-        for student in students:
-            data.append({
-                '学号': student.student_id,
-                '姓名': student.user.first_name,
-                '姓氏': student.user.last_name,
-                '用户名': student.user.username,
-                '邮箱': student.user.email,
-                '电话': student.user.phone,
-                '院系': student.department,
-                '年级': student.grade,
-                '入学日期': student.enrollment_date.strftime('%Y-%m-%d') if student.enrollment_date else '',
-                '毕业日期': student.graduation_date.strftime('%Y-%m-%d') if student.graduation_date else '',
-                '状态': student.get_status_display(),
-                '创建时间': student.created_at.strftime('%Y-%m-%d %H:%M:%S') if student.created_at else '',
-            })
-        
-        # 创建DataFrame
-        df = pd.DataFrame(data)
+        export_format = request.query_params.get('format', 'xlsx')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f'不支持的导出格式: {export_format}，可选: {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if export_format == 'parquet':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return Response(
+                    {'error': '服务器未安装 pyarrow，无法导出 Parquet 格式'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
-        # 创建Excel文件
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='学员数据', index=False)
+        filters = get_student_filters(request)
         
-        # 准备HTTP响应
-        output.seek(0)
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="students_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
+        # 后台导出：返回任务ID，由 run_student_jobs 进程池执行
+        if is_background(request):
+            job = StudentJob.objects.create(
+                job_type='export',
+                params={'format': export_format, **filters},
+                created_by=request.user
+            )
+            return job_accepted_response(job, request)
         
-        return response
+        students = Student.objects.filter_by_params(**filters)
+        return export_response(students, export_format)
 
 
 class StudentImportView(APIView):
-    """导入Excel文件批量创建学员"""
+    """
+    导入Excel/CSV文件批量创建学员
+    
+    dry_run=1 时只校验不写入；mode=upsert 时更新已存在的学员，而不是报错。
+    """
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
@@ -529,85 +728,51 @@ class StudentImportView(APIView):
         file = request.FILES['file']
         
         # 检查文件类型
-        if not file.name.endswith(('.xlsx', '.xls')):
+        if not file.name.lower().endswith(IMPORT_EXTENSIONS):
+            return Response(
+                {'error': f'只支持Excel或CSV文件 ({", ".join(IMPORT_EXTENSIONS)})'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        mode = request.query_params.get('mode', 'create')
+        if mode not in IMPORT_MODES:
             return Response(
-                {'error': '只支持Excel文件 (.xlsx, .xls)'},
+                {'error': f'不支持的导入模式: {mode}，可选: {", ".join(IMPORT_MODES)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # 后台导入：保存上传文件并返回任务ID，由 run_student_jobs 进程池执行
+        if is_background(request) and not is_dry_run(request):
+            job = StudentJob(job_type='import', params={'mode': mode}, created_by=request.user)
+            job.input_file.save(file.name, file)
+            return job_accepted_response(job, request)
+        
         try:
-            # 读取Excel文件
-            df = pd.read_excel(file)
+            # 流式读取文件，按批处理
+            reader = StudentFileReader(file, file.name)
+            
+            # 预检模式：一次性报告所有问题，不写入数据库
+            if is_dry_run(request):
+                results = validate_batches(reader.batches(), reader.columns, mode=mode)
+                return Response({
+                    'message': f'校验完成，可导入: {results["success"]}, 有问题: {results["failed"]}',
+                    'results': results
+                })
             
             # 检查必要的列
-            required_columns = ['学号', '姓名']
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            missing_columns = [col for col in REQUIRED_COLUMNS if col not in reader.columns]
             if missing_columns:
+                reader.close()
                 return Response(
-                    {'error': f'Excel文件缺少必要的列: {", ".join(missing_columns)}'},
+                    {'error': f'文件缺少必要的列: {", ".join(missing_columns)}'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # 处理数据
-            results = {
-                'total': len(df),
-                'success': 0,
-                'failed': 0,
-                'errors': []
-            }
-            
-            for index, row in df.iterrows():
-                try:
-                    # 准备数据
-                    student_data = {
-                        'student_id': str(row.get('学号', '')).strip(),
-                        'first_name': str(row.get('姓名', '')).strip(),
-                        'last_name': str(row.get('姓氏', '')).strip() if pd.notna(row.get('姓氏')) else '',
-                        'username': str(row.get('用户名', '')).strip() if pd.notna(row.get('用户名')) else '',
-                        'email': str(row.get('邮箱', '')).strip() if pd.notna(row.get('邮箱')) else '',
-                        'phone': str(row.get('电话', '')).strip() if pd.notna(row.get('电话')) else '',
-                        'department': str(row.get('院系', '')).strip() if pd.notna(row.get('院系')) else '',
-                        'grade': str(row.get('年级', '')).strip() if pd.notna(row.get('年级')) else '',
-                        'enrollment_date': self._parse_date(row.get('入学日期')) if pd.notna(row.get('入学日期')) else '',
-                        'graduation_date': self._parse_date(row.get('毕业日期')) if pd.notna(row.get('毕业日期')) else '',
-                        'status': self._map_status(str(row.get('状态', '')).strip()) if pd.notna(row.get('状态')) else 'active',
-                    }
-                    
-                    # 验证必填字段
-                    if not student_data['student_id']:
-                        raise ValueError('学号不能为空')
-                    if not student_data['first_name']:
-                        raise ValueError('姓名不能为空')
-                    
-                    # 检查学号是否已存在
-                    if Student.objects.filter(student_id=student_data['student_id']).exists():
-                        raise ValueError(f'学号 {student_data["student_id"]} 已存在')
-                    
-                    # 调试：打印准备的数据
-                    print(f"准备创建学员数据: {student_data}")
-                    
-                    # 创建学员
-                    serializer = StudentCreateSerializer(data=student_data)
-                    if serializer.is_valid():
-                        student = serializer.save()
-                        print(f"学员创建成功: {student.student_id} - {student.user.username}")
-                        results['success'] += 1
-                    else:
-                        print(f"数据验证失败: {serializer.errors}")
-                        raise ValueError(f'数据验证失败: {serializer.errors}')
-                        
-                except Exception as e:
-                    results['failed'] += 1
-                    error_msg = str(e)
-                    print(f"导入第{index + 2}行失败: {error_msg}")
-                    results['errors'].append({
-                        'row': index + 2,  # Excel行号（从2开始，因为第一行是标题）
-                        'student_id': str(row.get('学号', '')).strip() if pd.notna(row.get('学号')) else '未知',
-                        'error': error_msg
-                    })
+            # 批量导入
+            results = StudentBulkImporter(mode=mode).run(reader.records())
             
             return Response({
-                'message': f'导入完成，成功: {results["success"]}, 失败: {results["failed"]}',
+                'message': import_message(results),
                 'results': results
             })
             
@@ -616,40 +781,43 @@ class StudentImportView(APIView):
                 {'error': f'文件处理失败: {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+
+class StudentJobDetailView(APIView):
+    """查询后台导入导出任务进度"""
+    permission_classes = [permissions.IsAuthenticated]
     
-    def _map_status(self, status_str):
-        """映射状态字符串到数据库值"""
-        status_map = {
-            '在读': 'active',
-            '已毕业': 'graduated',
-            '休学': 'suspended',
-            '退学': 'dropped',
-            'active': 'active',
-            'graduated': 'graduated',
-            'suspended': 'suspended',
-            'dropped': 'dropped',
-        }
-        return status_map.get(status_str, 'active')
+    def get(self, request, job_id):
+        job = StudentJob.objects.filter(pk=job_id).first()
+        # 其他用户的任务按不存在处理
+        if job is None or not job.can_access(request.user):
+            return Response(
+                {'error': '任务不存在'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        serializer = StudentJobSerializer(job, context={'request': request})
+        return Response(serializer.data)
+
+
+class StudentJobDownloadView(APIView):
+    """下载后台导出任务的结果文件"""
+    permission_classes = [permissions.IsAuthenticated]
     
-    def _parse_date(self, date_value):
-        """解析日期值，支持多种格式"""
-        if pd.isna(date_value):
-            return ''
-        
-        # 如果已经是字符串，直接返回
-        if isinstance(date_value, str):
-            return date_value.strip()
-        
-        # 如果是pandas Timestamp，转换为字符串
-        if isinstance(date_value, pd.Timestamp):
-            return date_value.strftime('%Y-%m-%d')
-        
-        # 如果是datetime对象，转换为字符串
-        if hasattr(date_value, 'strftime'):
-            try:
-                return date_value.strftime('%Y-%m-%d')
-            except:
-                return str(date_value)
-        
-        # 其他情况转换为字符串
-        return str(date_value)
+    def get(self, request, job_id):
+        job = StudentJob.objects.filter(pk=job_id).first()
+        # 其他用户的任务按不存在处理
+        if job is None or not job.can_access(request.user):
+            return Response(
+                {'error': '任务不存在'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if job.status != 'completed' or not job.result_file:
+            return Response(
+                {'error': '任务尚未完成或没有结果文件'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return FileResponse(
+            job.result_file.open('rb'),
+            as_attachment=True,
+            filename=job.result_file.name.rsplit('/', 1)[-1]
+        )
@@ -0,0 +1,40 @@
+"""
+后台进程池的入口函数
+
+进程池一律以 spawn 方式启动工作进程：fork 出的子进程会继承父进程已打开的数据库连接，
+子进程关闭或释放这些连接时会在共享的套接字上发送 COM_QUIT，父进程的连接随之失效。
+本模块在顶层不导入任何 Django 模型，工作进程先执行 init_worker 完成 Django 初始化，
+之后再按需导入业务代码。
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def init_worker():
+    """工作进程初始化：加载 Django"""
+    import django
+
+    django.setup()
+
+
+def process_pool(max_workers):
+    """创建以 spawn 方式启动工作进程的进程池"""
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker
+    )
+
+
+def execute_job(job_id):
+    """在工作进程中执行一个学员导入导出任务"""
+    from .jobs import run_job
+
+    run_job(job_id)
+
+
+def make_renditions(photo_id, force=False):
+    """在工作进程中为一张相片生成缩略图"""
+    from .images import create_renditions
+
+    create_renditions(photo_id, force)
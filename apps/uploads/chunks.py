@@ -0,0 +1,190 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+
+from .models import UPLOAD_TEMP_DIR, UploadSession
+
+
+# 单个文件大小上限（默认 1GB）
+MAX_UPLOAD_SIZE = getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 1024 * 1024 * 1024)
+# 建议客户端使用的分片大小
+CHUNK_SIZE = getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024)
+# 从请求体读取、写入磁盘时的缓冲大小
+COPY_BUFFER_SIZE = 64 * 1024
+
+# 上传目标：(模型, 文件字段, 所有者字段)
+# 管理员可以上传到任意记录，其他用户只能上传到所有者是自己的记录（自己的成就、自己上传的资料）
+UPLOAD_TARGETS = {
+    'student_achievement': ('students.StudentAchievement', 'certificate_file', 'student__user'),
+    'course_material': ('courses.CourseMaterial', 'file', 'uploaded_by'),
+}
+# 完成上传后需要删除被替换文件的目标；学员成就的旧证书由 students 的信号按引用计数释放
+RELEASE_REPLACED_FILES = {'course_material'}
+
+
+class UploadError(Exception):
+    """分片上传协议错误，status 为应返回的 HTTP 状态码"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def is_admin(user):
+    return user.is_staff or user.user_type == 'admin'
+
+
+def get_target_object(target, object_id, user):
+    """返回用户有权上传的目标记录，不存在或无权上传时抛出 UploadError"""
+    model_name, _, owner_field = UPLOAD_TARGETS[target]
+    model = apps.get_model(model_name)
+    objects = model.objects.all()
+    if not is_admin(user):
+        objects = objects.filter(**{owner_field: user})
+    try:
+        return objects.get(pk=object_id)
+    except (model.DoesNotExist, ValueError, TypeError):
+        raise UploadError('上传目标不存在', status=404)
+
+
+def create_session(user, target, object_id, filename, size, sha256=''):
+    if target not in UPLOAD_TARGETS:
+        raise UploadError(f'不支持的上传目标，可选: {", ".join(UPLOAD_TARGETS)}')
+    if not filename:
+        raise UploadError('请提供文件名')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('文件大小无效')
+    if not 0 < size <= MAX_UPLOAD_SIZE:
+        raise UploadError(f'文件大小必须在 1 到 {MAX_UPLOAD_SIZE} 字节之间')
+    sha256 = (sha256 or '').lower()
+    if sha256 and len(sha256) != 64:
+        raise UploadError('sha256 必须是 64 位十六进制字符串')
+    get_target_object(target, object_id, user)
+
+    session = UploadSession.objects.create(
+        target=target,
+        object_id=object_id,
+        filename=os.path.basename(filename)[:255],
+        size=size,
+        sha256=sha256,
+        created_by=user
+    )
+    os.makedirs(UPLOAD_TEMP_DIR, exist_ok=True)
+    open(session.temp_path, 'wb').close()
+    return session
+
+
+def write_chunk(session_id, user, stream, offset, checksum=''):
+    """
+    把一个分片追加到临时文件
+
+    偏移量必须等于已接收的字节数，否则返回 409 和当前偏移量，客户端据此续传；
+    分片先边读边写入本次请求独立的临时文件并计算 SHA-256，与 checksum 不一致时丢弃。
+    读取请求体期间不加锁，之后才锁定会话行，重新检查偏移量并追加到会话的临时文件，
+    慢速或中断的上传不会阻塞同一会话的重试请求。
+    """
+    session = get_session(session_id, user)
+    check_offset(session, offset)
+
+    os.makedirs(UPLOAD_TEMP_DIR, exist_ok=True)
+    fd, chunk_path = tempfile.mkstemp(dir=UPLOAD_TEMP_DIR, prefix=f'{session.pk}.', suffix='.chunk')
+    try:
+        hasher = hashlib.sha256()
+        written = 0
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                data = stream.read(COPY_BUFFER_SIZE) if stream is not None else b''
+                if not data:
+                    break
+                written += len(data)
+                if offset + written > session.size:
+                    raise UploadError('分片超出文件大小')
+                hasher.update(data)
+                f.write(data)
+        if checksum and hasher.hexdigest() != checksum.lower():
+            raise UploadError('分片校验失败，请重新上传该分片')
+
+        with transaction.atomic():
+            session = get_session(session_id, user, for_update=True)
+            # 读取请求体期间其他请求可能已写入同一偏移量
+            check_offset(session, offset)
+            with open(session.temp_path, 'r+b') as f, open(chunk_path, 'rb') as chunk:
+                f.seek(offset)
+                shutil.copyfileobj(chunk, f, COPY_BUFFER_SIZE)
+                f.truncate(offset + written)
+
+            session.offset = offset + written
+            session.save(update_fields=['offset', 'updated_at'])
+    finally:
+        os.remove(chunk_path)
+    return session
+
+
+def check_offset(session, offset):
+    if session.status != 'uploading':
+        raise UploadError('上传已完成', status=409)
+    if offset != session.offset:
+        raise UploadError(f'偏移量不匹配，当前已接收 {session.offset} 字节', status=409)
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def complete_session(session_id, user):
+    """
+    校验完整文件并保存到目标记录的文件字段
+
+    文件以流的方式从临时文件复制到存储，不会整体读入内存。
+    """
+    with transaction.atomic():
+        session = get_session(session_id, user, for_update=True)
+        if session.status != 'uploading':
+            raise UploadError('上传已完成', status=409)
+        if session.offset != session.size:
+            raise UploadError(
+                f'文件尚未上传完整，已接收 {session.offset}/{session.size} 字节', status=409
+            )
+        if session.sha256 and file_sha256(session.temp_path) != session.sha256:
+            raise UploadError('文件校验失败，请重新上传')
+
+        # 创建会话之后权限可能已变化，完成时再检查一次
+        instance = get_target_object(session.target, session.object_id, user)
+        _, field_name, _ = UPLOAD_TARGETS[session.target]
+        field_file = getattr(instance, field_name)
+        old_name = field_file.name
+        with open(session.temp_path, 'rb') as f:
+            field_file.save(session.filename, File(f), save=False)
+        if hasattr(instance, 'file_size'):
+            instance.file_size = session.size
+        instance.save()
+        if session.target in RELEASE_REPLACED_FILES and old_name and old_name != field_file.name:
+            storage = field_file.storage
+            transaction.on_commit(lambda: storage.delete(old_name))
+
+        session.status = 'completed'
+        session.save(update_fields=['status', 'updated_at'])
+        transaction.on_commit(session.remove_temp_file)
+    return session, instance
+
+
+def get_session(session_id, user, for_update=False):
+    sessions = UploadSession.objects.filter(created_by=user)
+    if for_update:
+        sessions = sessions.select_for_update()
+    try:
+        return sessions.get(pk=session_id)
+    except UploadSession.DoesNotExist:
+        raise UploadError('上传会话不存在', status=404)
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.uploads.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = '清理长时间未完成的分片上传会话及其临时文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=24,
+            help='超过多少小时未更新的会话视为放弃（默认 24）'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        sessions = UploadSession.objects.filter(updated_at__lt=cutoff)
+        count = 0
+        for session in sessions.iterator():
+            session.remove_temp_file()
+            count += 1
+        sessions.delete()
+        self.stdout.write(self.style.SUCCESS(f'已清理 {count} 个上传会话'))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:11
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('student_achievement', '学员成就证书'), ('course_material', '课程资料')], max_length=30, verbose_name='上传目标')),
+                ('object_id', models.BigIntegerField(verbose_name='目标记录ID')),
+                ('filename', models.CharField(max_length=255, verbose_name='文件名')),
+                ('size', models.BigIntegerField(verbose_name='文件大小')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='已接收字节数')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='文件SHA-256')),
+                ('status', models.CharField(choices=[('uploading', '上传中'), ('completed', '已完成')], default='uploading', max_length=10, verbose_name='状态')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL, verbose_name='创建者')),
+            ],
+            options={
+                'verbose_name': '分片上传会话',
+                'verbose_name_plural': '分片上传会话',
+                'db_table': 'uploads_uploadsession',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
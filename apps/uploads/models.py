@@ -0,0 +1,69 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.db import models
+from apps.users.models import User
+
+
+# 分片上传的临时文件目录，与 MEDIA_ROOT 位于同一文件系统
+UPLOAD_TEMP_DIR = getattr(
+    settings, 'CHUNKED_UPLOAD_TEMP_DIR', os.path.join(settings.MEDIA_ROOT, '.uploads')
+)
+
+
+class UploadSession(models.Model):
+    """
+    分片上传会话
+
+    客户端创建会话后按偏移量逐片上传，已接收的数据追加到磁盘临时文件，
+    offset 记录已确认接收的字节数，断线后从 offset 继续上传。
+    """
+    STATUS_CHOICES = (
+        ('uploading', '上传中'),
+        ('completed', '已完成'),
+    )
+
+    TARGET_CHOICES = (
+        ('student_achievement', '学员成就证书'),
+        ('course_material', '课程资料'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    target = models.CharField(max_length=30, choices=TARGET_CHOICES, verbose_name='上传目标')
+    object_id = models.BigIntegerField(verbose_name='目标记录ID')
+    filename = models.CharField(max_length=255, verbose_name='文件名')
+    size = models.BigIntegerField(verbose_name='文件大小')
+    offset = models.BigIntegerField(default=0, verbose_name='已接收字节数')
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name='文件SHA-256')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='uploading',
+        verbose_name='状态'
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        verbose_name='创建者'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
+
+    class Meta:
+        db_table = 'uploads_uploadsession'
+        verbose_name = '分片上传会话'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def temp_path(self):
+        return os.path.join(UPLOAD_TEMP_DIR, f'{self.pk}.part')
+
+    def remove_temp_file(self):
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
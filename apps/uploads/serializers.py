@@ -0,0 +1,13 @@
+from rest_framework import serializers
+from .models import UploadSession
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """分片上传会话序列化器"""
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'target', 'object_id', 'filename', 'size', 'offset',
+            'sha256', 'status', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
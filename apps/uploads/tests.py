@@ -0,0 +1,153 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.courses.models import Course, CourseMaterial
+from apps.students.models import Student, StudentAchievement
+from apps.users.models import User
+from . import chunks, models
+from .models import UploadSession
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ChunkedUploadTest(TestCase):
+    """分片上传的偏移量、校验和上传目标的所有权检查"""
+
+    CONTENT = b'certificate-' * 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='student_0', user_type='student')
+        cls.other = User.objects.create_user(username='student_1', user_type='student')
+        student = Student.objects.create(
+            user=cls.owner, student_id='S0000', enrollment_date=date(2024, 9, 1)
+        )
+        cls.achievement = StudentAchievement.objects.create(
+            student=student,
+            achievement_type='academic',
+            title='成就',
+            date_achieved=date(2025, 1, 1),
+        )
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        temp_dir = os.path.join(media_root, '.uploads')
+        for module in (chunks, models):
+            patcher = mock.patch.object(module, 'UPLOAD_TEMP_DIR', temp_dir)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _create(self, target='student_achievement', object_id=None, **extra):
+        return self.client.post('/api/uploads/', {
+            'target': target,
+            'object_id': self.achievement.pk if object_id is None else object_id,
+            'filename': 'certificate.pdf',
+            'size': len(self.CONTENT),
+            **extra,
+        }, format='json')
+
+    def _put(self, session_id, offset, data, checksum=None):
+        headers = {'X-Chunk-SHA256': checksum} if checksum else {}
+        return self.client.put(
+            f'/api/uploads/{session_id}/?offset={offset}',
+            data,
+            content_type='application/octet-stream',
+            headers=headers
+        )
+
+    def test_upload_in_chunks(self):
+        response = self._create(sha256=sha256(self.CONTENT))
+        self.assertEqual(response.status_code, 201)
+        session_id = response.data['id']
+
+        first, second = self.CONTENT[:500], self.CONTENT[500:]
+        response = self._put(session_id, 0, first, sha256(first))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['offset'], 500)
+        self.assertEqual(self._put(session_id, 500, second).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/uploads/{session_id}/complete/')
+        self.assertEqual(response.status_code, 200)
+        self.achievement.refresh_from_db()
+        with self.achievement.certificate_file.open('rb') as f:
+            self.assertEqual(f.read(), self.CONTENT)
+        self.assertFalse(os.path.exists(UploadSession.objects.get(pk=session_id).temp_path))
+
+    def test_offset_conflict_returns_current_offset(self):
+        session_id = self._create().data['id']
+        self._put(session_id, 0, self.CONTENT[:100])
+
+        # 重复发送已写入的分片，或跳过一段
+        for offset in (0, 200):
+            response = self._put(session_id, offset, self.CONTENT[offset:offset + 100])
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.data['offset'], 100)
+
+        response = self.client.post(f'/api/uploads/{session_id}/complete/')
+        self.assertEqual(response.status_code, 409)
+
+    def test_checksum_mismatch(self):
+        session_id = self._create(sha256=sha256(b'something else')).data['id']
+        response = self._put(session_id, 0, self.CONTENT[:100], sha256(b'wrong'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(UploadSession.objects.get(pk=session_id).offset, 0)
+
+        self._put(session_id, 0, self.CONTENT)
+        response = self.client.post(f'/api/uploads/{session_id}/complete/')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': '文件校验失败，请重新上传'})
+
+    def test_chunk_beyond_size(self):
+        session_id = self._create().data['id']
+        response = self._put(session_id, 0, self.CONTENT + b'extra')
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_users_targets_are_not_found(self):
+        self.client.force_authenticate(self.other)
+        response = self._create()
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(UploadSession.objects.exists())
+
+        # 会话属于创建者，其他用户无法写入
+        self.client.force_authenticate(self.owner)
+        session_id = self._create().data['id']
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self._put(session_id, 0, self.CONTENT).status_code, 404)
+
+    def test_replaced_course_material_is_deleted(self):
+        course = Course.objects.create(course_code='C001', course_name='课程', total_hours=10)
+        material = CourseMaterial.objects.create(
+            course=course, title='资料', file=ContentFile(b'old', name='old.pdf'),
+            uploaded_by=self.owner
+        )
+        old_name = material.file.name
+        storage = material.file.storage
+
+        session_id = self._create(target='course_material', object_id=material.pk).data['id']
+        self._put(session_id, 0, self.CONTENT)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/uploads/{session_id}/complete/')
+        self.assertEqual(response.status_code, 200)
+
+        material.refresh_from_db()
+        self.assertEqual(material.file_size, len(self.CONTENT))
+        self.assertNotEqual(material.file.name, old_name)
+        self.assertFalse(storage.exists(old_name))
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'uploads'
+
+urlpatterns = [
+    # 分片上传（断点续传）
+    path('uploads/', views.UploadSessionCreateView.as_view(), name='upload-create'),
+    path('uploads/<uuid:session_id>/', views.UploadSessionDetailView.as_view(), name='upload-detail'),
+    path('uploads/<uuid:session_id>/complete/', views.UploadSessionCompleteView.as_view(), name='upload-complete'),
+]
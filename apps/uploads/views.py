@@ -0,0 +1,109 @@
+from rest_framework import status, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .chunks import (
+    CHUNK_SIZE, UPLOAD_TARGETS, UploadError, complete_session, create_session, get_session,
+    write_chunk
+)
+from .serializers import UploadSessionSerializer
+
+
+def error_response(error):
+    return Response({'error': str(error)}, status=error.status)
+
+
+class UploadSessionCreateView(APIView):
+    """
+    创建分片上传会话
+    
+    参数: target（student_achievement/course_material）、object_id、filename、size，
+    可选 sha256 用于完成时校验整个文件。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            session = create_session(
+                request.user,
+                target=request.data.get('target'),
+                object_id=request.data.get('object_id'),
+                filename=request.data.get('filename'),
+                size=request.data.get('size'),
+                sha256=request.data.get('sha256', '')
+            )
+        except UploadError as e:
+            return error_response(e)
+        
+        data = UploadSessionSerializer(session).data
+        data['chunk_size'] = CHUNK_SIZE
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(APIView):
+    """
+    查询进度、上传分片和取消上传
+    
+    PUT 的请求体为分片的原始字节，offset 查询参数为分片起始位置，
+    可选的 X-Chunk-SHA256 请求头用于校验分片内容。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, session_id):
+        try:
+            session = get_session(session_id, request.user)
+        except UploadError as e:
+            return error_response(e)
+        return Response(UploadSessionSerializer(session).data)
+    
+    def put(self, request, session_id):
+        try:
+            offset = int(request.query_params.get('offset', ''))
+        except ValueError:
+            return Response(
+                {'error': '请提供分片的 offset 参数'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            # 直接读取请求体流，不经过 DRF 的解析器，分片不会整体读入内存
+            session = write_chunk(
+                session_id,
+                request.user,
+                request.stream,
+                offset,
+                request.headers.get('X-Chunk-SHA256', '')
+            )
+        except UploadError as e:
+            response = error_response(e)
+            if e.status == status.HTTP_409_CONFLICT:
+                # 返回当前进度，客户端据此续传
+                try:
+                    response.data['offset'] = get_session(session_id, request.user).offset
+                except UploadError:
+                    pass
+            return response
+        return Response(UploadSessionSerializer(session).data)
+    
+    def delete(self, request, session_id):
+        try:
+            session = get_session(session_id, request.user)
+        except UploadError as e:
+            return error_response(e)
+        session.remove_temp_file()
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionCompleteView(APIView):
+    """完成上传：校验文件并保存到目标记录"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, session_id):
+        try:
+            session, instance = complete_session(session_id, request.user)
+        except UploadError as e:
+            return error_response(e)
+        
+        _, field_name, _ = UPLOAD_TARGETS[session.target]
+        data = UploadSessionSerializer(session).data
+        data['file_url'] = request.build_absolute_uri(getattr(instance, field_name).url)
+        return Response(data)
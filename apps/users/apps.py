@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class UsersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.users'
+    label = 'users'
+
+    def ready(self):
+        # 注册信号处理函数
+        from . import signals  # noqa: F401
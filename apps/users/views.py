@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import login, logout
+from pxweb.response_cache import cache_response
 from .models import User, UserProfile
 from .serializers import (
     UserSerializer, UserCreateSerializer, UserUpdateSerializer,
@@ -74,6 +75,7 @@ class UserDetailView(APIView):
         except User.DoesNotExist:
             return None
     
+    @cache_response('user:{pk}')
     def get(self, request, pk):
         user = self.get_object(pk)
         if user is None:
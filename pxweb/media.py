@@ -0,0 +1,216 @@
+"""
+受保护的媒体文件服务
+
+媒体地址由存储的 url() 生成，带有签名和过期时间（见 pxweb.storage），先校验签名，
+再按路径检查权限：临时目录（.uploads、.incoming 等以点开头的目录）一律拒绝，
+student_jobs/ 下的导入导出文件只允许任务创建者和管理员访问。
+校验通过后根据 MEDIA_SERVE_BACKEND 把文件传输交给前端服务器：
+    'nginx'  返回 X-Accel-Redirect，由 nginx 的 internal location 发送文件
+    'apache' 返回 X-Sendfile（mod_xsendfile，lighttpd 同样支持）
+    'python' 由 Django 直接发送，支持 Range 断点续传、ETag 和 If-Modified-Since
+
+nginx 配置示例（MEDIA_ACCEL_PREFIX 默认为 /protected-media/）：
+    location /protected-media/ {
+        internal;
+        alias /path/to/media/;
+    }
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import permissions, status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.students.models import StudentJob
+from .storage import check_media_signature
+
+
+MEDIA_SERVE_BACKEND = getattr(settings, 'MEDIA_SERVE_BACKEND', 'python')
+MEDIA_ACCEL_PREFIX = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# 每次读取的块大小
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# 只允许任务创建者和管理员访问的目录
+JOB_MEDIA_PREFIX = 'student_jobs/'
+
+
+def resolve_media_path(path):
+    """把 URL 中的相对路径解析为 MEDIA_ROOT 下的文件路径，越界或不存在时抛出 Http404"""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('文件不存在')
+    if not os.path.isfile(full_path):
+        raise Http404('文件不存在')
+    return full_path
+
+
+def content_type_for(path):
+    content_type, encoding = mimetypes.guess_type(path)
+    return content_type or 'application/octet-stream'
+
+
+def make_etag(stat):
+    """由修改时间和大小生成 ETag，文件改变时随之改变"""
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    解析单个 bytes 区间，返回 (start, end)（包含 end）
+
+    无 Range 头或格式不支持（如多区间）时返回 None，按完整文件响应；
+    区间无法满足时抛出 ValueError。
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500 表示最后 500 个字节
+        length = int(last)
+        if length == 0:
+            raise ValueError('无法满足的区间')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('无法满足的区间')
+    return start, end
+
+
+def range_is_current(request, etag, mtime):
+    """If-Range 与当前文件一致时才返回部分内容，否则返回完整文件"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    modified_since = parse_http_date_safe(if_range)
+    return modified_since is not None and int(mtime) <= modified_since
+
+
+def iter_file_range(f, start, length):
+    try:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        f.close()
+
+
+def serve_file(request, full_path):
+    """Python 发送文件：处理条件请求（304/412）和 Range 请求（206/416）"""
+    stat = os.stat(full_path)
+    etag = make_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        response['Accept-Ranges'] = 'bytes'
+        # 浏览器可缓存，但每次使用前需验证，文件未变化时返回 304
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if conditional is not None:
+        return finish(conditional)
+
+    content_type = content_type_for(full_path)
+    try:
+        byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return finish(response)
+
+    if byte_range is None or not range_is_current(request, etag, stat.st_mtime):
+        return finish(FileResponse(open(full_path, 'rb'), content_type=content_type))
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        iter_file_range(open(full_path, 'rb'), start, length),
+        status=206,
+        content_type=content_type
+    )
+    response['Content-Length'] = str(length)
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return finish(response)
+
+
+def offload_file(path, full_path, backend):
+    """把文件传输交给前端服务器，Django 只返回响应头"""
+    response = HttpResponse(content_type=content_type_for(full_path))
+    if backend == 'nginx':
+        response['X-Accel-Redirect'] = quote(MEDIA_ACCEL_PREFIX + path)
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+def is_hidden_path(path):
+    """临时目录（.uploads、.incoming 等）中的文件不对外提供"""
+    return any(part.startswith('.') for part in path.replace('\\', '/').split('/'))
+
+
+def can_access_job_file(user, path):
+    """导入导出文件只允许任务创建者和管理员访问"""
+    jobs = StudentJob.objects.filter(Q(input_file=path) | Q(result_file=path))
+    return any(job.can_access(user) for job in jobs)
+
+
+class ProtectedMediaView(APIView):
+    """
+    凭签名地址访问的媒体文件
+
+    签名地址本身即是访问凭证，<img src> 等无法携带 JWT 的请求也能加载相片；
+    导入导出文件另外要求登录，同时接受 JWT 和 Session 认证。
+    """
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, path):
+        if is_hidden_path(path):
+            raise Http404('文件不存在')
+        if not check_media_signature(
+            path, request.query_params.get('expires'), request.query_params.get('signature', '')
+        ):
+            return Response(
+                {'error': '文件地址无效或已过期'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if path.startswith(JOB_MEDIA_PREFIX) and not can_access_job_file(request.user, path):
+            return Response(
+                {'error': '没有权限访问该文件'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        full_path = resolve_media_path(path)
+        if MEDIA_SERVE_BACKEND in ('nginx', 'apache'):
+            return offload_file(path, full_path, MEDIA_SERVE_BACKEND)
+        return serve_file(request, full_path)
@@ -0,0 +1,127 @@
+"""
+接口响应缓存
+
+GET 响应的数据按 主机 + 路径 + 查询参数 + 用户角色 缓存在 RESPONSE_CACHE_ALIAS 指定的缓存中，
+缓存键还包含媒体签名地址的时间窗口，缓存的数据中不会出现已过期的文件地址；
+每个条目带有若干标签（如 student:42）。每个标签在缓存中保存一个版本号并参与缓存键的计算，
+修改数据时在事务提交后更换相关标签的版本号，旧条目随之失效，不需要逐个查找删除，
+因此适用于任何 Django 缓存后端（本地开发用 LocMem/文件缓存，生产环境可用 Redis、Memcached）。
+
+用法：
+    class StudentDetailView(APIView):
+        @cache_response('student:{pk}')
+        def get(self, request, pk):
+            ...
+
+    invalidate_tags(f'student:{student.pk}')
+"""
+import hashlib
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .storage import media_url_window
+
+
+RESPONSE_CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+# 缓存条目的有效期（秒），标签失效之外的兜底
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+KEY_PREFIX = 'response'
+
+
+def get_cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def tag_key(tag):
+    return f'{KEY_PREFIX}:tag:{tag}'
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def tag_versions(cache, tags):
+    """
+    返回各标签当前的版本号
+
+    版本号不存在（首次使用或被缓存淘汰）时生成新的随机值，不会与旧条目的版本号重复。
+    """
+    keys = [tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def request_role(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    return getattr(user, 'user_type', '') or 'user'
+
+
+def normalized_query(request):
+    """按参数名排序后的查询字符串，参数顺序不同的同一请求得到相同结果"""
+    return urlencode(sorted(request.query_params.lists()), doseq=True)
+
+
+def response_cache_key(cache, request, tags):
+    raw = '|'.join([
+        request.get_host(), request.path, normalized_query(request), request_role(request),
+        str(media_url_window()), *tag_versions(cache, tags)
+    ])
+    return f'{KEY_PREFIX}:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+
+def invalidate_tags(*tags):
+    """
+    使带有这些标签的缓存条目失效
+
+    在事务提交后执行：提交前失效的话，并发请求可能又把旧数据以新版本号写回缓存。
+    """
+    tags = set(tags)
+    if not tags:
+        return
+
+    def invalidate():
+        get_cache().set_many({tag_key(tag): new_version() for tag in tags}, None)
+
+    transaction.on_commit(invalidate)
+
+
+def cache_response(*tags, timeout=None):
+    """
+    缓存 APIView 的 get 方法的响应数据
+
+    tags 为格式字符串，用 URL 参数填充，如 'student:{student_id}'；只缓存 200 响应。
+    缓存的是序列化后的数据，命中时跳过查询和序列化，仍按请求协商的格式渲染。
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            cache = get_cache()
+            key = response_cache_key(cache, request, [tag.format(**kwargs) for tag in tags])
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(
+                    key, response.data, RESPONSE_CACHE_TIMEOUT if timeout is None else timeout
+                )
+                response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'apps.teachers',
     'apps.students',
     'apps.training',
+    'apps.uploads',
 ]
 
 MIDDLEWARE = [
@@ -135,6 +136,38 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# 媒体文件发送方式：'python'（Django 直接发送）、'nginx'（X-Accel-Redirect）、'apache'（X-Sendfile）
+MEDIA_SERVE_BACKEND = 'python'
+# nginx internal location 的前缀，需与 nginx 配置一致
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+# 媒体文件签名地址的时间窗口（秒），地址在 1 到 2 个窗口后过期
+MEDIA_URL_MAX_AGE = 3600
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'pxweb.storage.SignedFileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# 缓存配置
+# 接口响应缓存需要在多个进程间共享（缩略图后台进程也会使其失效），本地使用文件缓存；
+# 生产环境可将 'responses' 换成 Redis、Memcached 等任意 Django 缓存后端
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'responses',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 300
+
 # REST Framework配置
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -15,10 +15,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from . import views
+from .media import ProtectedMediaView
 
 urlpatterns = [
     path('', views.index, name='index'),
@@ -27,13 +28,20 @@ urlpatterns = [
     # API路由
     path('api/', include('apps.users.urls')),
     path('api/', include('apps.students.urls')),
+    path('api/', include('apps.uploads.urls')),
     # 其他应用的API路由将在后续添加
     # path('api/courses/', include('apps.courses.urls')),
     # path('api/teachers/', include('apps.teachers.urls')),
     # path('api/training/', include('apps.training.urls')),
+    
+    # 媒体文件（相片、证书等）需要登录后访问，生产环境由 nginx/Apache 发送文件
+    re_path(
+        r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'),
+        ProtectedMediaView.as_view(),
+        name='protected-media'
+    ),
 ]
 
-# 开发环境下的静态文件和媒体文件服务
+# 开发环境下的静态文件服务
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)